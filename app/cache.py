@@ -0,0 +1,50 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from app import metrics
+
+
+class LRUCache:
+    """Small thread-safe LRU cache that reports hits/misses to /metrics under its name"""
+
+    def __init__(self, name: str, max_size: int = 256):
+        self.name = name
+        self.max_size = max_size
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                metrics.record_cache(self.name, hit=True)
+                return self._data[key]
+        metrics.record_cache(self.name, hit=False)
+        return None
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def make_key(*parts) -> str:
+    """Stable cache key for JSON-like arguments (dicts are order-independent)"""
+    return json.dumps(parts, sort_keys=True, default=str)
+
+
+def hashed_key(*parts) -> str:
+    """Fixed-size digest of make_key(*parts), for keys built from large inputs like whole HTML pages"""
+    return hashlib.sha256(make_key(*parts).encode("utf-8")).hexdigest()
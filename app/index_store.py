@@ -0,0 +1,183 @@
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable, List, Optional, Set
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Versioned index layout used in multi-worker mode:
+#   <root>/CURRENT          name of the published version (replaced atomically)
+#   <root>/versions/v000001 immutable Chroma directory per published version
+#   <root>/.writer.lock     held by the single process building the next version
+#   <root>/readers/<id>     lease naming the versions a reader process has open
+INDEX_DIR = os.getenv("QA_INDEX_DIR", "./chroma_index")
+KEEP_VERSIONS = int(os.getenv("QA_INDEX_KEEP_VERSIONS", "3"))
+# How often readers look for a newly published version (seconds)
+REFRESH_INTERVAL = float(os.getenv("QA_INDEX_REFRESH_INTERVAL", "1.0"))
+
+
+def multi_worker_enabled() -> bool:
+    """Versioned index is used whenever the backend runs more than one worker"""
+    return int(os.getenv("QA_WORKERS", "1")) > 1 or os.getenv("QA_INDEX_MODE") == "versioned"
+
+
+class IndexVersions:
+    def __init__(self, root: str = INDEX_DIR, keep: int = KEEP_VERSIONS):
+        self.root = root
+        self.keep = keep
+        self.versions_dir = os.path.join(root, "versions")
+        self.readers_dir = os.path.join(root, "readers")
+        os.makedirs(self.versions_dir, exist_ok=True)
+        os.makedirs(self.readers_dir, exist_ok=True)
+
+    @property
+    def current_file(self) -> str:
+        return os.path.join(self.root, "CURRENT")
+
+    def current(self) -> Optional[str]:
+        """Name of the published version, or None before the first publish"""
+        try:
+            with open(self.current_file) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def path(self, version: str) -> str:
+        return os.path.join(self.versions_dir, version)
+
+    def list_versions(self) -> List[str]:
+        return sorted(
+            name for name in os.listdir(self.versions_dir)
+            if name.startswith("v") and not name.endswith(".staging")
+        )
+
+    @contextmanager
+    def writer_lock(self):
+        """Exclusive cross-process lock: only one process builds a new version at a time"""
+        with open(os.path.join(self.root, ".writer.lock"), "a+") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        time.sleep(0.1)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def ensure_published(self, initialize: Callable[[str], None]):
+        """Publish a first version so readers always have something to open
+
+        `initialize` builds the initial database in the staging directory, so a
+        reader is never the first process to open (and write to) a version.
+        """
+        if self.current():
+            return
+        with self.writer_lock():
+            if not self.current():
+                version = self.begin_version()
+                try:
+                    initialize(self.staging_path(version))
+                    self.publish(version)
+                except Exception:
+                    self.abort(version)
+                    raise
+
+    def hold(self, reader_id: str, versions: Iterable[str]):
+        """Record every version this reader has open, so prune() keeps them"""
+        lease = os.path.join(self.readers_dir, reader_id)
+        tmp_file = lease + ".tmp"
+        with open(tmp_file, "w") as f:
+            f.write("\n".join(versions))
+        os.replace(tmp_file, lease)
+
+    def release(self, reader_id: str):
+        try:
+            os.remove(os.path.join(self.readers_dir, reader_id))
+        except FileNotFoundError:
+            pass
+
+    def held_versions(self) -> Set[str]:
+        """Versions named by leases of reader processes that are still alive"""
+        held = set()
+        for reader_id in os.listdir(self.readers_dir):
+            if reader_id.endswith(".tmp"):
+                continue
+            lease = os.path.join(self.readers_dir, reader_id)
+            if not _process_alive(reader_id.split("-", 1)[0]):
+                self.release(reader_id)
+                continue
+            try:
+                with open(lease) as f:
+                    held.update(line.strip() for line in f if line.strip())
+            except FileNotFoundError:
+                pass
+        return held
+
+    def begin_version(self) -> str:
+        """Stage the next version as a copy of the current one; call with writer_lock held"""
+        existing = self.list_versions()
+        next_number = int(existing[-1][1:]) + 1 if existing else 1
+        version = f"v{next_number:06d}"
+        staging = self.staging_path(version)
+        shutil.rmtree(staging, ignore_errors=True)
+        current = self.current()
+        if current:
+            shutil.copytree(self.path(current), staging)
+        else:
+            os.makedirs(staging)
+        return version
+
+    def staging_path(self, version: str) -> str:
+        return self.path(version) + ".staging"
+
+    def publish(self, version: str):
+        """Make a staged version visible to readers with an atomic rename + pointer swap"""
+        os.replace(self.staging_path(version), self.path(version))
+        tmp_file = self.current_file + ".tmp"
+        with open(tmp_file, "w") as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.current_file)
+        self.prune()
+
+    def abort(self, version: str):
+        shutil.rmtree(self.staging_path(version), ignore_errors=True)
+
+    def prune(self):
+        """Drop old versions beyond the newest few, never one a live reader still holds"""
+        protected = self.held_versions() | {self.current()}
+        versions = self.list_versions()
+        for version in versions[:-self.keep] if self.keep > 0 else versions:
+            if version not in protected:
+                shutil.rmtree(self.path(version), ignore_errors=True)
+
+
+def _process_alive(pid: str) -> bool:
+    if not pid.isdigit():
+        return False
+    if os.name == "nt":
+        # os.kill(pid, 0) would terminate the process on Windows; treat leases as live
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,82 @@
+import argparse
+import json
+import os
+import time
+from typing import Dict, List
+
+from app.index_store import IndexVersions
+
+# File types the writer can read as plain text
+TEXT_EXTENSIONS = (".md", ".txt", ".json", ".html")
+
+
+def _manifest_path(index: IndexVersions) -> str:
+    return os.path.join(index.root, "indexed_files.json")
+
+
+def _load_manifest(index: IndexVersions) -> Dict[str, float]:
+    try:
+        with open(_manifest_path(index)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _save_manifest(index: IndexVersions, manifest: Dict[str, float]):
+    tmp_path = _manifest_path(index) + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, _manifest_path(index))
+
+
+def pending_documents(data_dir: str, manifest: Dict[str, float]) -> List[Dict]:
+    """Documents in data_dir that are new or changed since they were last indexed"""
+    documents = []
+    for filename in sorted(os.listdir(data_dir)):
+        path = os.path.join(data_dir, filename)
+        if not os.path.isfile(path) or not filename.lower().endswith(TEXT_EXTENSIONS):
+            continue
+        mtime = os.path.getmtime(path)
+        if manifest.get(filename) == mtime:
+            continue
+        with open(path, encoding="utf-8", errors="replace") as f:
+            documents.append({"filename": filename, "content": f.read(), "mtime": mtime})
+    return documents
+
+
+def index_pending(store, data_dir: str) -> int:
+    """Index new/changed files as one new published version; returns how many files were indexed"""
+    manifest = _load_manifest(store.index)
+    documents = pending_documents(data_dir, manifest)
+    if not documents:
+        return 0
+    store.add_documents(documents)
+    manifest.update({doc["filename"]: doc["mtime"] for doc in documents})
+    _save_manifest(store.index, manifest)
+    return len(documents)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single ingestion writer for the multi-worker index")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--watch", type=float, default=0, help="poll interval in seconds (0 = index once and exit)")
+    args = parser.parse_args()
+
+    # Imported here so --help works without the embedding stack installed
+    from app.vector_db import VectorStore
+    store = VectorStore(versioned=True)
+
+    try:
+        while True:
+            count = index_pending(store, args.data_dir)
+            if count:
+                print(f"Indexed {count} files, published {store.version}")
+            if not args.watch:
+                break
+            time.sleep(args.watch)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,26 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, FileResponse
 import os
+import time
 import aiofiles
 import json
-from typing import List
+from typing import List, Optional
+
+from app import metrics, profiling, replay, uploads
+from app.cache import LRUCache, hashed_key
+from app.index_store import multi_worker_enabled
+from app.models import UploadInit, UploadCommit
 
 app = FastAPI(title="Autonomous QA Agent")
 
+# Metrics, traces and caches live in each worker process. With several workers every
+# series carries a worker label (so each stays monotonic across scrapes) and every
+# response names the worker that answered it, which is the one to ask for /traces.
+WORKER_ID = str(os.getpid())
+if multi_worker_enabled():
+    metrics.registry.const_labels["worker"] = WORKER_ID
+
 # CORS middleware - IMPORTANT for Streamlit connection
 app.add_middleware(
     CORSMiddleware,
@@ -17,9 +30,72 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    """Record per-endpoint latency and keep a span trace for each request"""
+    started = time.perf_counter()
+    status = 500
+    with metrics.start_trace(f"{request.method} {request.url.path}") as trace:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            response.headers["X-Trace-Id"] = trace.trace_id
+            response.headers["X-Worker-Id"] = WORKER_ID
+            return response
+        finally:
+            endpoint = metrics.endpoint_label(request.scope)
+            metrics.REQUEST_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint, method=request.method)
+            metrics.REQUEST_COUNT.inc(endpoint=endpoint, method=request.method, status=str(status))
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    """Opt a single request into profiling with the X-Profile header (1, cprofile or sample)
+
+    The header is ignored unless QA_PROFILE_ALLOW_HEADER is set.
+    """
+    mode = profiling.header_mode(request.headers.get("X-Profile"))
+    if not mode:
+        return await call_next(request)
+    with profiling.request_profiling(mode):
+        return await call_next(request)
+
 # Ensure data directory exists
 os.makedirs("data", exist_ok=True)
 
+# Generation output only depends on the request, so repeated requests are served from memory
+test_case_cache = LRUCache("generate_test_cases", max_size=512)
+script_cache = LRUCache("generate_script", max_size=512)
+
+@app.on_event("shutdown")
+def flush_recorded_requests():
+    replay.flush_records()
+
+@app.on_event("startup")
+async def warm_up_from_replay_log():
+    """Replay a recorded request log (QA_REPLAY_WARMUP=path) so the first real user hits warm caches
+
+    Only the generation caches are warmed: no request path queries VectorStore yet,
+    so its query-embedding and search caches fill once generation starts using it.
+    """
+    path = os.getenv("QA_REPLAY_WARMUP")
+    if not path:
+        return
+    handlers = {
+        "/generate-test-cases": lambda entry: generate_test_cases(**entry["params"]),
+        "/generate-script": lambda entry: generate_script(entry["json"]),
+    }
+    started = time.perf_counter()
+    warmed = failed = 0
+    with replay.replaying():
+        for entry in replay.load_log(path):
+            try:
+                await handlers[entry["endpoint"]](entry)
+                warmed += 1
+            except Exception as e:
+                failed += 1
+                print(f"Warm-up request failed ({entry['endpoint']}): {str(e)}")
+    print(f"Warm-up replayed {warmed} requests ({failed} failed) in {time.perf_counter() - started:.2f}s")
+
 @app.get("/")
 async def root():
     return {"message": "Autonomous QA Agent API"}
@@ -28,7 +104,37 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "backend"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text exposition of backend metrics"""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/traces")
+async def list_traces(limit: int = 20):
+    return {"traces": metrics.traces.recent(limit)}
+
+@app.get("/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    trace = metrics.traces.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
+    return trace
+
+@app.get("/profiles")
+async def list_profiles():
+    if not profiling.enabled():
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    return {"profiles": profiling.list_profiles()}
+
+@app.get("/profiles/{name}")
+async def download_profile(name: str):
+    path = profiling.profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Profile {name} not found")
+    return FileResponse(path, filename=name)
+
 @app.post("/ingest-documents")
+@profiling.profiled("ingest_documents")
 async def ingest_documents(files: List[UploadFile] = File(...)):
     try:
         documents_processed = 0
@@ -40,9 +146,10 @@ async def ingest_documents(files: List[UploadFile] = File(...)):
             file_path = f"data/{safe_filename}"
             
             # Save file to data directory
-            async with aiofiles.open(file_path, "wb") as f:
-                content = await file.read()
-                await f.write(content)
+            with metrics.span("upload", file=safe_filename):
+                async with aiofiles.open(file_path, "wb") as f:
+                    content = await file.read()
+                    await f.write(content)
             
             documents_processed += 1
             processed_files.append(safe_filename)
@@ -61,38 +168,81 @@ async def ingest_documents(files: List[UploadFile] = File(...)):
         print(f"Error in ingest-documents: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing documents: {str(e)}")
 
+# Resumable chunked uploads: init -> PUT parts (optionally gzip/zstd) -> commit
+@app.post("/uploads")
+async def init_upload(request_data: UploadInit):
+    uploads.cleanup_stale()
+    return uploads.init_upload(request_data.filename, request_data.total_size, request_data.sha256)
+
+@app.get("/uploads/{upload_id}")
+async def upload_status(upload_id: str):
+    """Report received parts so an interrupted client can resume"""
+    return uploads.upload_status(upload_id)
+
+@app.put("/uploads/{upload_id}/parts/{index}")
+async def upload_part(upload_id: str, index: int, request: Request):
+    with metrics.span("upload", part=index):
+        return await uploads.write_part(
+            upload_id,
+            index,
+            request.stream(),
+            encoding=request.headers.get("Content-Encoding", "identity"),
+            sha256=request.headers.get("X-Part-SHA256"),
+        )
+
+@app.post("/uploads/{upload_id}/commit")
+def commit_upload(upload_id: str, request_data: Optional[UploadCommit] = None):
+    # Sync endpoint: FastAPI runs it in the threadpool, so assembling large files doesn't block the loop
+    total_parts = request_data.total_parts if request_data else None
+    result = uploads.commit_upload(upload_id, total_parts)
+    print(f"Processed file: {result['filename']} ({result['size']} bytes in {result['parts']} parts)")
+    return {"status": "Upload Committed", **result}
+
+@app.delete("/uploads/{upload_id}")
+async def abort_upload(upload_id: str):
+    uploads.abort_upload(upload_id)
+    return {"status": "Upload Aborted", "upload_id": upload_id}
+
 @app.post("/generate-test-cases")
 async def generate_test_cases(query: str):
     try:
-        # Mock response for now - you'll add AI later
-        test_cases = [
-            {
-                "test_id": "TC-001",
-                "feature": "Discount Code",
-                "test_scenario": "Apply valid discount code SAVE15",
-                "expected_result": "15% discount applied to total price",
-                "grounded_in": "product_specs.md"
-            },
-            {
-                "test_id": "TC-002", 
-                "feature": "Form Validation",
-                "test_scenario": "Submit form with invalid email",
-                "expected_result": "Error message shown in red text",
-                "grounded_in": "ui_ux_guide.txt"
-            },
-            {
-                "test_id": "TC-003",
-                "feature": "Payment Method",
-                "test_scenario": "Select PayPal payment option",
-                "expected_result": "PayPal option is selected successfully",
-                "grounded_in": "product_specs.md"
-            }
-        ]
+        replay.record("/generate-test-cases", params={"query": query})
+        cached = test_case_cache.get(query)
+        if cached is not None:
+            return {"test_cases": cached}
+        
+        with metrics.span("generate", kind="test_cases"):
+            # Mock response for now - you'll add AI later
+            test_cases = [
+                {
+                    "test_id": "TC-001",
+                    "feature": "Discount Code",
+                    "test_scenario": "Apply valid discount code SAVE15",
+                    "expected_result": "15% discount applied to total price",
+                    "grounded_in": "product_specs.md"
+                },
+                {
+                    "test_id": "TC-002", 
+                    "feature": "Form Validation",
+                    "test_scenario": "Submit form with invalid email",
+                    "expected_result": "Error message shown in red text",
+                    "grounded_in": "ui_ux_guide.txt"
+                },
+                {
+                    "test_id": "TC-003",
+                    "feature": "Payment Method",
+                    "test_scenario": "Select PayPal payment option",
+                    "expected_result": "PayPal option is selected successfully",
+                    "grounded_in": "product_specs.md"
+                }
+            ]
+        test_case_cache.put(query, test_cases)
         return {"test_cases": test_cases}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating test cases: {str(e)}")
 
 @app.post("/generate-script")
+@profiling.profiled("generate_script")
 async def generate_script(request_data: dict):
     try:
         # Extract test_case from the request data
@@ -106,6 +256,13 @@ async def generate_script(request_data: dict):
                 detail="Missing required test_case data with test_id"
             )
         
+        replay.record("/generate-script", body=request_data)
+        # Hashed, so the cache doesn't keep a copy of the whole page per entry
+        cache_key = hashed_key(test_case, html_content)
+        cached = script_cache.get(cache_key)
+        if cached is not None:
+            return {"script": cached}
+        
         # Get test case details with safe defaults
         test_id = test_case.get('test_id', 'TC-000')
         feature = test_case.get('feature', 'General')
@@ -116,7 +273,8 @@ async def generate_script(request_data: dict):
         method_name = test_id.lower().replace('-', '_')
         
         # FIXED: Enhanced Selenium script with proper f-string formatting
-        script = f'''from selenium import webdriver
+        with metrics.span("generate", kind="script", test_id=test_id):
+            script = f'''from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
@@ -285,6 +443,7 @@ if __name__ == "__main__":
     success = run_test()
     exit(0 if success else 1)
 '''
+        script_cache.put(cache_key, script)
         return {"script": script}
     
     except Exception as e:
@@ -293,4 +452,10 @@ if __name__ == "__main__":
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info")
\ No newline at end of file
+    workers = int(os.getenv("QA_WORKERS", "1"))
+    if workers > 1:
+        # Workers import the app themselves. No endpoint queries VectorStore yet, so only the HTTP
+        # endpoints scale with workers; index writes go through the versioned store (see app/index_store.py)
+        uvicorn.run("app.main:app", host="0.0.0.0", port=8000, log_level="info", workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info")
\ No newline at end of file
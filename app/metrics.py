@@ -0,0 +1,235 @@
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+# Default latency buckets in seconds (same spirit as the Prometheus client defaults)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _escape_label_value(value) -> str:
+    """Escape a label value as the Prometheus text format requires"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = list(key) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    body = ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs)
+    return "{" + body + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self, const_labels: LabelKey = ()) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(const_labels + key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelKey, List[int]] = {}
+        self._sums: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-1] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def render(self, const_labels: LabelKey = ()) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for series in sorted(self._counts):
+                counts = self._counts[series]
+                key = const_labels + series
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, {'le': str(bound)})} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, {'le': '+Inf'})} {counts[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {self._sums[series]}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {counts[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        # Labels added to every series, e.g. the worker pid when several processes serve /metrics
+        self.const_labels: Dict[str, str] = {}
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, help_text)
+            return self._metrics[name]
+
+    def histogram(self, name: str, help_text: str, buckets=DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, help_text, buckets)
+            return self._metrics[name]
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        const_labels = _label_key(self.const_labels)
+        for metric in metrics:
+            lines.extend(metric.render(const_labels))
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# Backend metrics
+REQUEST_LATENCY = registry.histogram(
+    "qa_http_request_duration_seconds", "HTTP request latency by endpoint"
+)
+REQUEST_COUNT = registry.counter(
+    "qa_http_requests_total", "HTTP requests by endpoint, method and status"
+)
+STAGE_LATENCY = registry.histogram(
+    "qa_stage_duration_seconds", "Pipeline stage latency (upload, chunk, embed, index, search, generate)"
+)
+EMBED_BATCH_SIZE = registry.histogram(
+    "qa_embedding_batch_size", "Number of texts per encoder batch", BATCH_SIZE_BUCKETS
+)
+EMBEDDED_TEXTS = registry.counter(
+    "qa_embedding_texts_total", "Texts embedded"
+)
+EMBED_SECONDS = registry.counter(
+    "qa_embedding_seconds_total", "Time spent embedding (divide texts by this for throughput)"
+)
+CHROMA_QUERY_LATENCY = registry.histogram(
+    "qa_chroma_query_duration_seconds", "Chroma collection query latency"
+)
+CACHE_REQUESTS = registry.counter(
+    "qa_cache_requests_total", "Cache lookups by cache name and result (hit/miss)"
+)
+
+
+def endpoint_label(scope: dict) -> str:
+    """Route template for a request scope, so path parameters don't explode label cardinality
+
+    Requests that matched no route (404 scans) all share the "unmatched" label.
+    """
+    return getattr(scope.get("route"), "path", "unmatched")
+
+
+def record_cache(cache: str, hit: bool):
+    """Count a cache lookup; hit ratio is hits / (hits + misses) per cache"""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+# Per-request span tracing
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("qa_current_trace", default=None)
+
+
+class Trace:
+    def __init__(self, name: str):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.started = time.perf_counter()
+        self.spans: List[dict] = []
+        self._depth = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "duration_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "spans": list(self.spans),
+        }
+
+
+class TraceStore:
+    """Keeps the most recent request traces in memory"""
+
+    def __init__(self, max_traces: int = 200):
+        self.max_traces = max_traces
+        self._traces: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def add(self, trace: Trace):
+        with self._lock:
+            self._traces[trace.trace_id] = trace.to_dict()
+            while len(self._traces) > self.max_traces:
+                self._traces.pop(next(iter(self._traces)))
+
+    def get(self, trace_id: str) -> Optional[dict]:
+        return self._traces.get(trace_id)
+
+    def recent(self, limit: int = 20) -> List[dict]:
+        with self._lock:
+            return list(self._traces.values())[-limit:][::-1]
+
+
+traces = TraceStore()
+
+
+@contextmanager
+def start_trace(name: str):
+    """Open a trace for the current request; spans opened inside are attached to it"""
+    trace = Trace(name)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        traces.add(trace)
+
+
+@contextmanager
+def span(stage: str, **attributes):
+    """Time a pipeline stage, feeding the stage histogram and the current trace (if any)"""
+    trace = _current_trace.get()
+    started = time.perf_counter()
+    offset = started - trace.started if trace else 0.0
+    if trace:
+        trace._depth += 1
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_LATENCY.observe(elapsed, stage=stage)
+        if trace:
+            trace._depth -= 1
+            trace.spans.append({
+                "stage": stage,
+                "start_ms": round(offset * 1000, 3),
+                "duration_ms": round(elapsed * 1000, 3),
+                "depth": trace._depth,
+                **attributes,
+            })
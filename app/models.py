@@ -14,4 +14,12 @@ class TestCase(BaseModel):
 
 class ScriptRequest(BaseModel):
     test_case: TestCase
-    html_content: str
\ No newline at end of file
+    html_content: str
+
+class UploadInit(BaseModel):
+    filename: str
+    total_size: Optional[int] = None
+    sha256: Optional[str] = None
+
+class UploadCommit(BaseModel):
+    total_parts: Optional[int] = None
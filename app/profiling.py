@@ -0,0 +1,242 @@
+import cProfile
+import functools
+import inspect
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+
+# Profiling is opt-in: QA_PROFILE=1|cprofile|sample turns it on for every call.
+# Single requests can ask for it with the "X-Profile" header only when
+# QA_PROFILE_ALLOW_HEADER is set, since profiling slows the server down a lot.
+PROFILE_DIR = os.getenv("QA_PROFILE_DIR", "profiles")
+# Number of profiled runs kept on disk; older runs' artifacts are deleted
+KEEP_PROFILES = int(os.getenv("QA_PROFILE_KEEP", "20"))
+PROFILE_MODES = ("cprofile", "sample")
+SAMPLE_INTERVAL = float(os.getenv("QA_PROFILE_SAMPLE_INTERVAL", "0.005"))
+TRACEMALLOC_FRAMES = 10
+
+_request_mode: ContextVar[Optional[str]] = ContextVar("qa_profile_mode", default=None)
+_active = threading.local()
+# cProfile installs a per-interpreter hook, so only one profile runs at a time
+_profile_lock = threading.Lock()
+# Artifacts are written by one background thread so dumping never blocks the event loop
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="qa-profile-writer")
+
+
+def parse_mode(value: Optional[str]) -> Optional[str]:
+    """Map an env/header value to a profiling mode, or None when disabled"""
+    if not value:
+        return None
+    value = value.strip().lower()
+    if value in ("0", "false", "off", "no"):
+        return None
+    if value in PROFILE_MODES:
+        return value
+    return "cprofile"
+
+
+def header_allowed() -> bool:
+    return parse_mode(os.getenv("QA_PROFILE_ALLOW_HEADER")) is not None
+
+
+def header_mode(value: Optional[str]) -> Optional[str]:
+    """Profiling mode requested by an X-Profile header, or None unless QA_PROFILE_ALLOW_HEADER is set"""
+    return parse_mode(value) if header_allowed() else None
+
+
+def enabled() -> bool:
+    """Whether profiling can run at all (and so whether its artifacts are served)"""
+    return header_allowed() or parse_mode(os.getenv("QA_PROFILE")) is not None
+
+
+def current_mode() -> Optional[str]:
+    return _request_mode.get() or parse_mode(os.getenv("QA_PROFILE"))
+
+
+@contextmanager
+def request_profiling(mode: Optional[str]):
+    """Enable profiling for everything running in the current request context"""
+    token = _request_mode.set(mode)
+    try:
+        yield
+    finally:
+        _request_mode.reset(token)
+
+
+class StackSampler:
+    """Samples one thread's Python stack on a timer and aggregates collapsed stacks"""
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self) -> str:
+        """Collapsed-stack format, readable by flamegraph.pl / speedscope"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+
+def _artifact_base(name: str) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    # The pid keeps names unique when several workers share PROFILE_DIR
+    return os.path.join(PROFILE_DIR, f"{name}-{stamp}-{os.getpid()}-{time.perf_counter_ns() % 1_000_000:06d}")
+
+
+@contextmanager
+def profile_section(name: str):
+    """Profile the enclosed block when profiling is on; nested sections are folded into the outer one
+
+    Only one section is profiled at a time per process: a section that starts while
+    another is running is not profiled and writes no artifacts. For async handlers the
+    profiler and sampler watch the event-loop thread across awaits, so the profile also
+    contains every other coroutine that ran on the loop in the meantime.
+    """
+    mode = current_mode()
+    if not mode or getattr(_active, "name", None) or not _profile_lock.acquire(blocking=False):
+        yield
+        return
+
+    _active.name = name
+    started_tracemalloc = not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    before = tracemalloc.take_snapshot()
+
+    profiler = sampler = None
+    if mode == "sample":
+        sampler = StackSampler(threading.get_ident())
+        sampler.start()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield
+    finally:
+        try:
+            if profiler:
+                profiler.disable()
+            if sampler:
+                sampler.stop()
+            after = tracemalloc.take_snapshot()
+            if started_tracemalloc:
+                tracemalloc.stop()
+            _writer.submit(_write_artifacts, _artifact_base(name), profiler, sampler, before, after)
+        finally:
+            _active.name = None
+            _profile_lock.release()
+
+
+def _write_artifacts(base: str, profiler, sampler, before, after):
+    try:
+        if profiler:
+            profiler.dump_stats(base + ".prof")
+            summary = io.StringIO()
+            pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(40)
+            with open(base + ".txt", "w") as f:
+                f.write(summary.getvalue())
+        if sampler:
+            with open(base + ".collapsed", "w") as f:
+                f.write(sampler.dump())
+        after.dump(base + ".tracemalloc")
+        with open(base + ".alloc.txt", "w") as f:
+            for stat in after.compare_to(before, "lineno")[:40]:
+                f.write(f"{stat}\n")
+        prune_profiles()
+    except Exception as e:
+        print(f"Error writing profile {base}: {str(e)}")
+
+
+def prune_profiles(keep: int = KEEP_PROFILES):
+    """Delete artifacts of all but the newest `keep` profiled runs"""
+    if not os.path.isdir(PROFILE_DIR):
+        return
+    runs = {}
+    for filename in os.listdir(PROFILE_DIR):
+        run = filename.split(".", 1)[0]
+        runs.setdefault(run, []).append(os.path.join(PROFILE_DIR, filename))
+    by_age = sorted(runs.values(), key=lambda paths: max(os.path.getmtime(p) for p in paths))
+    for paths in by_age[:-keep] if keep > 0 else by_age:
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def profiled(name: str):
+    """Decorator wrapping a sync or async function in profile_section"""
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with profile_section(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_section(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def list_profiles() -> List[dict]:
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for filename in os.listdir(PROFILE_DIR):
+        path = os.path.join(PROFILE_DIR, filename)
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            profiles.append((stat.st_mtime, {
+                "name": filename,
+                "size_bytes": stat.st_size,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(stat.st_mtime)),
+            }))
+    # Newest first; names sort by section before time, so order by mtime instead
+    profiles.sort(key=lambda item: (item[0], item[1]["name"]), reverse=True)
+    return [profile for _, profile in profiles]
+
+
+def profile_path(filename: str) -> Optional[str]:
+    """Resolve a profile artifact by name, refusing anything outside PROFILE_DIR
+
+    Returns None while profiling is disabled, so artifacts left on disk aren't served.
+    """
+    if not enabled() or os.path.basename(filename) != filename or filename in (".", ".."):
+        return None
+    path = os.path.join(PROFILE_DIR, filename)
+    return path if os.path.isfile(path) else None
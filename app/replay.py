@@ -0,0 +1,118 @@
+import json
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Endpoints whose requests can be recorded and replayed
+REPLAYABLE_ENDPOINTS = ("/generate-test-cases", "/generate-script")
+
+# Recorded lines are appended by one background thread, so request handlers never do file I/O
+_record_queue: "queue.Queue" = queue.Queue()
+_record_thread: Optional[threading.Thread] = None
+_record_thread_lock = threading.Lock()
+_replaying: ContextVar[bool] = ContextVar("qa_replaying", default=False)
+
+
+def load_log(path: str) -> List[Dict]:
+    """Read replayable entries from a JSONL request log
+
+    Each line looks like {"endpoint": "/generate-test-cases", "params": {"query": ...}}
+    or {"endpoint": "/generate-script", "json": {"test_case": ..., "html_content": ...}}.
+    Blank, malformed and non-replayable lines are skipped.
+    """
+    entries = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(entry, dict) or entry.get("endpoint") not in REPLAYABLE_ENDPOINTS:
+                continue
+            entry.setdefault("params", {})
+            entry.setdefault("json", {})
+            entries.append(entry)
+    return entries
+
+
+def record(endpoint: str, params: Optional[Dict] = None, body: Optional[Dict] = None):
+    """Append a request to the log named by QA_RECORD_REQUESTS (no-op when unset or replaying)"""
+    path = os.getenv("QA_RECORD_REQUESTS")
+    if not path or _replaying.get():
+        return
+    line = json.dumps({"endpoint": endpoint, "params": params or {}, "json": body or {}}, sort_keys=True)
+    _ensure_record_thread()
+    _record_queue.put((path, line))
+
+
+def _ensure_record_thread():
+    global _record_thread
+    with _record_thread_lock:
+        if _record_thread is None or not _record_thread.is_alive():
+            _record_thread = threading.Thread(target=_drain_records, name="qa-replay-recorder", daemon=True)
+            _record_thread.start()
+
+
+def _drain_records():
+    while True:
+        path, line = _record_queue.get()
+        try:
+            _append_line(path, line)
+        except OSError as e:
+            print(f"Error recording request to {path}: {str(e)}")
+        finally:
+            _record_queue.task_done()
+
+
+def _append_line(path: str, line: str):
+    """Append one line with a single O_APPEND write, under an exclusive lock where available
+
+    Several worker processes may record to the same log, so a line must never be split.
+    """
+    data = (line + "\n").encode("utf-8")
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        written = 0
+        while written < len(data):
+            written += os.write(fd, data[written:])
+    finally:
+        os.close(fd)
+
+
+def flush_records():
+    """Block until every queued request has been written (used by tests and shutdown)"""
+    _record_queue.join()
+
+
+@contextmanager
+def replaying():
+    """Mark the current context as a replay so its requests aren't recorded again"""
+    token = _replaying.set(True)
+    try:
+        yield
+    finally:
+        _replaying.reset(token)
+
+
+def iter_requests(entries: List[Dict]) -> Iterator[Dict]:
+    """Turn log entries into keyword arguments for an HTTP client's request()"""
+    for entry in entries:
+        request = {"method": "POST", "url": entry["endpoint"]}
+        if entry["params"]:
+            request["params"] = entry["params"]
+        if entry["json"]:
+            request["json"] = entry["json"]
+        yield request
@@ -0,0 +1,356 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+import zlib
+from typing import AsyncIterator, List, Optional
+
+import aiofiles
+from fastapi import HTTPException
+
+try:
+    import zstandard
+except ImportError:  # zstd-compressed parts are optional
+    zstandard = None
+
+DATA_DIR = "data"
+UPLOAD_DIR = os.path.join(DATA_DIR, ".uploads")
+# Upper bound on one decompressed part; keeps a single request's disk/memory use bounded
+MAX_PART_SIZE = int(os.getenv("QA_MAX_PART_SIZE", str(16 * 1024 * 1024)))
+# Upper bound on parts per upload (part indexes run from 0 to MAX_PARTS - 1)
+MAX_PARTS = int(os.getenv("QA_MAX_PARTS", "10000"))
+# Missing part indexes listed in a 409 response; the full count is always reported
+MISSING_PARTS_REPORTED = 100
+# Unfinished uploads older than this are dropped by cleanup_stale()
+UPLOAD_TTL = int(os.getenv("QA_UPLOAD_TTL", str(24 * 3600)))
+COPY_CHUNK_SIZE = 1024 * 1024
+SUPPORTED_ENCODINGS = ("identity", "gzip") + (("zstd",) if zstandard else ())
+
+_UPLOAD_ID = re.compile(r"^[0-9a-f]{32}$")
+# zstd frame magic numbers (RFC 8878); skippable frames use 16 magics ending in 0-F
+_ZSTD_MAGIC = 0xFD2FB528
+_ZSTD_SKIPPABLE_MAGIC = 0x184D2A50
+
+
+def safe_filename(filename: str) -> str:
+    return os.path.basename(filename).replace(" ", "_")
+
+
+def _upload_dir(upload_id: str) -> str:
+    if not _UPLOAD_ID.match(upload_id):
+        raise HTTPException(status_code=400, detail="Invalid upload id")
+    path = os.path.join(UPLOAD_DIR, upload_id)
+    if not os.path.isdir(path):
+        raise HTTPException(status_code=404, detail=f"Upload {upload_id} not found")
+    return path
+
+
+def _part_path(upload_dir: str, index: int) -> str:
+    return os.path.join(upload_dir, f"part-{index:06d}")
+
+
+def _read_meta(upload_dir: str) -> dict:
+    with open(os.path.join(upload_dir, "meta.json")) as f:
+        return json.load(f)
+
+
+def _write_meta(upload_dir: str, meta: dict, name: str = "meta.json"):
+    tmp_path = os.path.join(upload_dir, f"{name}.{uuid.uuid4().hex[:8]}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(upload_dir, name))
+
+
+def _read_committed(upload_dir: str) -> Optional[dict]:
+    """Result of a finished commit, kept so a retried commit returns it instead of failing"""
+    try:
+        with open(os.path.join(upload_dir, "committed.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _received_parts(upload_dir: str) -> List[int]:
+    return sorted(
+        int(name[len("part-"):]) for name in os.listdir(upload_dir)
+        if name.startswith("part-") and not name.endswith(".tmp")
+    )
+
+
+def _missing_parts(parts: List[int], total_parts: int, limit: int = MISSING_PARTS_REPORTED) -> List[int]:
+    """First `limit` indexes below total_parts that are not in the sorted `parts` list"""
+    missing = []
+    expected = 0
+    for index in [index for index in parts if index < total_parts] + [total_parts]:
+        missing.extend(range(expected, min(index, expected + limit - len(missing))))
+        if len(missing) >= limit:
+            break
+        expected = index + 1
+    return missing
+
+
+def _check_encoding(encoding: str) -> str:
+    encoding = (encoding or "identity").lower()
+    if encoding not in SUPPORTED_ENCODINGS:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Unsupported part encoding '{encoding}', expected one of {', '.join(SUPPORTED_ENCODINGS)}"
+        )
+    return encoding
+
+
+async def _inflate(body: AsyncIterator[bytes], encoding: str, spool_path: str):
+    """Yield decompressed output in pieces of at most COPY_CHUNK_SIZE bytes
+
+    Output is capped per call, so a small compressed chunk can't balloon in memory.
+    """
+    if encoding == "identity":
+        async for chunk in body:
+            for start in range(0, len(chunk), COPY_CHUNK_SIZE):
+                yield chunk[start:start + COPY_CHUNK_SIZE]
+        return
+
+    if encoding == "gzip":
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            async for chunk in body:
+                while True:
+                    if decompressor.eof and chunk:
+                        # Concatenated members (as `cat a.gz b.gz` produces) decode as one stream;
+                        # trailing bytes that aren't a gzip member fail as a corrupt part
+                        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                    data = decompressor.decompress(chunk, COPY_CHUNK_SIZE)
+                    chunk = decompressor.unused_data if decompressor.eof else decompressor.unconsumed_tail
+                    if data:
+                        yield data
+                    elif not chunk:
+                        break
+            data = decompressor.flush()
+        except zlib.error:
+            raise HTTPException(status_code=400, detail="Corrupt gzip part")
+        for start in range(0, len(data), COPY_CHUNK_SIZE):
+            yield data[start:start + COPY_CHUNK_SIZE]
+        if not decompressor.eof:
+            raise HTTPException(status_code=400, detail="Truncated compressed part")
+        return
+
+    # zstd has no output cap on push-style decompression, so the compressed part is
+    # spooled to disk first and then pulled through a stream reader in bounded reads
+    compressed = 0
+    async with aiofiles.open(spool_path, "wb") as f:
+        async for chunk in body:
+            compressed += len(chunk)
+            if compressed > MAX_PART_SIZE:
+                raise HTTPException(status_code=413, detail=f"Part exceeds {MAX_PART_SIZE} bytes")
+            await f.write(chunk)
+    # The stream reader stops quietly at the end of a cut-off frame, so check framing first
+    if not _zstd_frames_complete(spool_path):
+        raise HTTPException(status_code=400, detail="Truncated compressed part")
+    try:
+        with open(spool_path, "rb") as source:
+            reader = zstandard.ZstdDecompressor().stream_reader(source, read_across_frames=True)
+            while True:
+                data = reader.read(COPY_CHUNK_SIZE)
+                if not data:
+                    break
+                yield data
+    except zstandard.ZstdError:
+        raise HTTPException(status_code=400, detail="Corrupt zstd part")
+
+
+def _zstd_frames_complete(path: str) -> bool:
+    """Walk the frame and block headers of a zstd file (without decompressing) and check
+    that every frame, including its optional checksum, ends inside the file"""
+    size = os.path.getsize(path)
+    position = 0
+    with open(path, "rb") as f:
+        while position < size:
+            f.seek(position)
+            header = f.read(18)
+            if len(header) < 8:
+                return False
+            magic = int.from_bytes(header[:4], "little")
+            if magic & 0xFFFFFFF0 == _ZSTD_SKIPPABLE_MAGIC:
+                position += 8 + int.from_bytes(header[4:8], "little")
+                continue
+            if magic != _ZSTD_MAGIC:
+                return False
+            try:
+                position += zstandard.frame_header_size(header)
+            except zstandard.ZstdError:
+                return False
+            checksum_size = 4 if header[4] & 0x04 else 0
+            while True:
+                f.seek(position)
+                block = f.read(3)
+                if len(block) < 3:
+                    return False
+                value = int.from_bytes(block, "little")
+                block_type, block_size = (value >> 1) & 0x3, value >> 3
+                # RLE blocks store one byte that is repeated block_size times
+                position += 3 + (1 if block_type == 1 else block_size)
+                if value & 0x1:
+                    break
+            position += checksum_size
+    return position == size
+
+
+def _validate_filename(filename: str) -> str:
+    name = safe_filename(filename or "")
+    # Dot names would escape data/ or collide with the .uploads staging directory
+    if not name or name.startswith("."):
+        raise HTTPException(status_code=400, detail=f"Invalid filename '{filename}'")
+    return name
+
+
+def init_upload(filename: str, total_size: Optional[int] = None, sha256: Optional[str] = None) -> dict:
+    filename = _validate_filename(filename)
+    upload_id = uuid.uuid4().hex
+    upload_dir = os.path.join(UPLOAD_DIR, upload_id)
+    os.makedirs(upload_dir)
+    meta = {
+        "upload_id": upload_id,
+        "filename": filename,
+        "total_size": total_size,
+        "sha256": sha256.lower() if sha256 else None,
+        "created": time.time(),
+    }
+    _write_meta(upload_dir, meta)
+    return {**meta, "max_part_size": MAX_PART_SIZE, "encodings": list(SUPPORTED_ENCODINGS)}
+
+
+def upload_status(upload_id: str) -> dict:
+    upload_dir = _upload_dir(upload_id)
+    meta = _read_meta(upload_dir)
+    parts = _received_parts(upload_dir)
+    received_bytes = sum(os.path.getsize(_part_path(upload_dir, i)) for i in parts)
+    return {**meta, "received_parts": parts, "received_bytes": received_bytes, "committed": _read_committed(upload_dir)}
+
+
+async def write_part(
+    upload_id: str,
+    index: int,
+    body: AsyncIterator[bytes],
+    encoding: str = "identity",
+    sha256: Optional[str] = None,
+) -> dict:
+    """Stream one part to disk, decompressing on the fly; a re-sent part replaces the old one"""
+    upload_dir = _upload_dir(upload_id)
+    if not 0 <= index < MAX_PARTS:
+        raise HTTPException(status_code=400, detail=f"Part index must be between 0 and {MAX_PARTS - 1}")
+    if _read_committed(upload_dir):
+        raise HTTPException(status_code=409, detail=f"Upload {upload_id} is already committed")
+    encoding = _check_encoding(encoding)
+    digest = hashlib.sha256()
+    size = 0
+    final_path = _part_path(upload_dir, index)
+    # Written under a temp name so a dropped connection never leaves a half part behind
+    tmp_path = f"{final_path}.{uuid.uuid4().hex[:8]}.tmp"
+    spool_path = tmp_path + ".raw.tmp"
+    try:
+        async with aiofiles.open(tmp_path, "wb") as f:
+            async for data in _inflate(body, encoding, spool_path):
+                size += len(data)
+                if size > MAX_PART_SIZE:
+                    raise HTTPException(status_code=413, detail=f"Part exceeds {MAX_PART_SIZE} bytes")
+                digest.update(data)
+                await f.write(data)
+        if sha256 and digest.hexdigest() != sha256.lower():
+            raise HTTPException(status_code=422, detail=f"Part {index} failed content-hash verification")
+        os.replace(tmp_path, final_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        if os.path.exists(spool_path):
+            os.remove(spool_path)
+    return {"upload_id": upload_id, "index": index, "size": size, "sha256": digest.hexdigest()}
+
+
+def commit_upload(upload_id: str, total_parts: Optional[int] = None) -> dict:
+    """Concatenate parts into data/<filename>, verifying size and whole-file hash
+
+    Committing again returns the first commit's result, so a client whose commit
+    response was lost can safely retry.
+    """
+    upload_dir = _upload_dir(upload_id)
+    committed = _read_committed(upload_dir)
+    if committed:
+        return committed
+    if total_parts is not None and not 0 < total_parts <= MAX_PARTS:
+        raise HTTPException(status_code=400, detail=f"total_parts must be between 1 and {MAX_PARTS}")
+    meta = _read_meta(upload_dir)
+    parts = _received_parts(upload_dir)
+    if total_parts is None:
+        total_parts = parts[-1] + 1 if parts else 0
+    missing = _missing_parts(parts, total_parts)
+    if not total_parts or missing:
+        raise HTTPException(status_code=409, detail={
+            "message": "Upload is missing parts",
+            "missing_parts": missing,
+            "missing_count": total_parts - len([index for index in parts if index < total_parts]),
+        })
+
+    digest = hashlib.sha256()
+    size = 0
+    final_path = os.path.join(DATA_DIR, meta["filename"])
+    # Unique name, so two overlapping commits of one upload never write the same file
+    tmp_path = os.path.join(upload_dir, f"assembled.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with open(tmp_path, "wb") as out:
+            for index in range(total_parts):
+                with open(_part_path(upload_dir, index), "rb") as part:
+                    while True:
+                        chunk = part.read(COPY_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        digest.update(chunk)
+                        size += len(chunk)
+                        out.write(chunk)
+    except FileNotFoundError:
+        # An overlapping commit finished first and removed the parts
+        os.remove(tmp_path)
+        committed = _read_committed(upload_dir)
+        if committed:
+            return committed
+        raise HTTPException(status_code=409, detail="Upload parts changed during commit")
+
+    if meta.get("total_size") is not None and size != meta["total_size"]:
+        os.remove(tmp_path)
+        raise HTTPException(status_code=422, detail=f"Size mismatch: expected {meta['total_size']}, got {size}")
+    if meta.get("sha256") and digest.hexdigest() != meta["sha256"]:
+        os.remove(tmp_path)
+        raise HTTPException(status_code=422, detail="Upload failed content-hash verification")
+
+    os.replace(tmp_path, final_path)
+    result = {"filename": meta["filename"], "size": size, "sha256": digest.hexdigest(), "parts": total_parts}
+    # Parts are dropped but the marker stays until cleanup_stale() expires the upload
+    _write_meta(upload_dir, result, "committed.json")
+    for index in parts:
+        try:
+            os.remove(_part_path(upload_dir, index))
+        except FileNotFoundError:
+            pass
+    return result
+
+
+def abort_upload(upload_id: str):
+    shutil.rmtree(_upload_dir(upload_id), ignore_errors=True)
+
+
+def cleanup_stale(max_age: int = UPLOAD_TTL) -> int:
+    """Remove uploads (unfinished, or committed markers) older than max_age seconds; returns how many were removed"""
+    if not os.path.isdir(UPLOAD_DIR):
+        return 0
+    removed = 0
+    cutoff = time.time() - max_age
+    for upload_id in os.listdir(UPLOAD_DIR):
+        path = os.path.join(UPLOAD_DIR, upload_id)
+        if os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
@@ -1,20 +1,191 @@
 import chromadb
 from sentence_transformers import SentenceTransformer
-from typing import List, Dict
+from typing import List, Dict, Optional
 import os
+import threading
+import time
 import uuid
+from contextlib import contextmanager
+
+from app import metrics
+from app.cache import LRUCache, make_key
+from app.index_store import IndexVersions, REFRESH_INTERVAL, multi_worker_enabled
+from app.profiling import profiled
+
+# Texts per forward pass of the sentence encoder
+ENCODE_BATCH_SIZE = int(os.getenv("QA_EMBED_BATCH_SIZE", "32"))
+
+
+# chroma shares one System per path between every client in the process, so a path's
+# System is only stopped once the last client opened through _open_client is released
+_client_refs: Dict[str, int] = {}
+_client_refs_lock = threading.Lock()
+
+
+def _open_client(path: str):
+    with _client_refs_lock:
+        client = chromadb.PersistentClient(path=path)
+        _client_refs[client._identifier] = _client_refs.get(client._identifier, 0) + 1
+    return client
+
+
+def _release_client(client):
+    """Release a client from _open_client; the last release stops the path's System
+
+    clear_system_cache() is class-wide and would also detach every other client in
+    the process (including the one serving reads), so only this path's entry is removed.
+    """
+    identifier = client._identifier
+    with _client_refs_lock:
+        _client_refs[identifier] = _client_refs.get(identifier, 1) - 1
+        if _client_refs[identifier] > 0:
+            return
+        del _client_refs[identifier]
+        try:
+            # _system is looked up in the cache, so read it before dropping the entry
+            system = client._system
+        except (AttributeError, KeyError):
+            system = None
+        # chroma's own (misspelled) class-level cache of one System per path
+        cache = getattr(type(client), "_identifer_to_system", None)
+        if cache is not None:
+            cache.pop(identifier, None)
+        if system is not None:
+            system.stop()
+
+
+class _OpenVersion:
+    """Chroma client on one published index version, and the searches still using it"""
+
+    def __init__(self, version: str, client):
+        self.version = version
+        self.client = client
+        self.readers = 0
+
 
 class VectorStore:
-    def __init__(self):
-        self.client = chromadb.PersistentClient(path="./chroma_db")
+    def __init__(self, versioned: Optional[bool] = None):
+        # Multi-worker mode reads immutable published index versions instead of sharing ./chroma_db
+        if versioned is None:
+            versioned = multi_worker_enabled()
         self.embedder = SentenceTransformer('all-MiniLM-L6-v2')
+        self.query_embedding_cache = LRUCache("query_embedding", max_size=1024)
+        # Search results are only valid until the collection changes; add_documents clears it
+        self.search_cache = LRUCache("search", max_size=256)
+        self.index = IndexVersions() if versioned else None
+        self.version = None
+        self.client = None
+        self._last_refresh = 0.0
+        # Lease name for this reader; the pid prefix lets prune() ignore dead processes
+        self._reader_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        # Versioned mode: the open version searches start on, plus swapped-out versions
+        # kept open until the searches still running on them finish
+        self._current: Optional[_OpenVersion] = None
+        self._retired: List[_OpenVersion] = []
+        self._lock = threading.Lock()
+        if self.index:
+            self.index.ensure_published(self._initialize_version)
+            self.refresh(force=True)
+        else:
+            self.client = _open_client("./chroma_db")
         
-    def create_collection(self, collection_name: str):
-        return self.client.get_or_create_collection(
+    def create_collection(self, collection_name: str, client=None):
+        return (client or self.client).get_or_create_collection(
             name=collection_name,
             metadata={"hnsw:space": "cosine"}
         )
     
+    def refresh(self, force: bool = False):
+        """Hot-swap to the latest published index version (versioned mode only)"""
+        if not self.index or (not force and time.monotonic() - self._last_refresh < REFRESH_INTERVAL):
+            return
+        with self._lock:
+            self._last_refresh = time.monotonic()
+            version = self.index.current()
+            while version and version != self.version:
+                # Lease before opening, then re-read CURRENT: a version that is still current
+                # once the lease exists can't have been pruned, so the open never creates an
+                # empty database at a removed path. Otherwise follow the newer version.
+                self.index.hold(self._reader_id, self._open_versions() + [version])
+                latest = self.index.current()
+                if latest == version:
+                    self._swap(version)
+                version = latest
+    
+    def _open_versions(self) -> List[str]:
+        return [opened.version for opened in self._retired + [self._current] if opened]
+    
+    def _swap(self, version: str):
+        """Open `version` for new searches; call with self._lock held"""
+        old = self._current
+        self._current = _OpenVersion(version, _open_client(self.index.path(version)))
+        self.client = self._current.client
+        self.version = version
+        self.search_cache.clear()
+        if old is not None:
+            self._retired.append(old)
+        self._release_idle()
+    
+    def _release_idle(self):
+        """Close swapped-out versions no search is using and drop them from the lease; call with self._lock held"""
+        idle = [opened for opened in self._retired if opened.readers == 0]
+        if not idle:
+            return
+        self._retired = [opened for opened in self._retired if opened.readers > 0]
+        for opened in idle:
+            _release_client(opened.client)
+        self.index.hold(self._reader_id, self._open_versions())
+    
+    @contextmanager
+    def _reading(self):
+        """Yield (version, client) for one search; a swap won't close the client until it finishes"""
+        if not self.index:
+            yield None, self.client
+            return
+        with self._lock:
+            opened = self._current
+            opened.readers += 1
+        try:
+            yield opened.version, opened.client
+        finally:
+            with self._lock:
+                opened.readers -= 1
+                self._release_idle()
+    
+    def close(self):
+        """Release every open index version (versioned mode) so they can be pruned"""
+        if not self.index:
+            if self.client is not None:
+                _release_client(self.client)
+                self.client = None
+            return
+        with self._lock:
+            for opened in self._retired + [self._current]:
+                if opened:
+                    _release_client(opened.client)
+            self._current = None
+            self._retired = []
+            self.client = None
+            self.version = None
+            self.index.release(self._reader_id)
+    
+    def _initialize_version(self, path: str, collection_name: str = "qa_documents"):
+        """Create the Chroma database and collection in a staging directory before it is published"""
+        client = _open_client(path)
+        try:
+            self.create_collection(collection_name, client)
+        finally:
+            _release_client(client)
+    
+    def _read_collection(self, collection_name: str, client):
+        if not self.index:
+            return self.create_collection(collection_name, client)
+        # Published versions are immutable, so readers never create collections in them
+        try:
+            return client.get_collection(name=collection_name)
+        except Exception:
+            return None
+    
     def chunk_text(self, text: str, chunk_size: int = 512, chunk_overlap: int = 50) -> List[str]:
         """
         Simple text chunking without external dependencies
@@ -55,42 +226,104 @@ class VectorStore:
         # Filter out empty chunks
         return [chunk.strip() for chunk in chunks if chunk.strip()]
     
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in a single encoder call, which runs them in ENCODE_BATCH_SIZE batches"""
+        if not texts:
+            return []
+        with metrics.span("embed", texts=len(texts)):
+            started = time.perf_counter()
+            embeddings = self.embedder.encode(texts, batch_size=ENCODE_BATCH_SIZE).tolist()
+            metrics.EMBED_SECONDS.inc(time.perf_counter() - started)
+        for start in range(0, len(texts), ENCODE_BATCH_SIZE):
+            metrics.EMBED_BATCH_SIZE.observe(min(ENCODE_BATCH_SIZE, len(texts) - start))
+        metrics.EMBEDDED_TEXTS.inc(len(texts))
+        return embeddings
+    
+    @profiled("vector_store_add_documents")
     def add_documents(self, documents: List[Dict], collection_name: str = "qa_documents"):
-        collection = self.create_collection(collection_name)
-        
         ids = []
-        embeddings = []
         metadatas = []
         documents_list = []
         
-        for doc in documents:
-            chunks = self.chunk_text(doc['content'])
-            for i, chunk in enumerate(chunks):
-                chunk_id = str(uuid.uuid4())
-                embedding = self.embedder.encode(chunk).tolist()
-                
-                ids.append(chunk_id)
-                embeddings.append(embedding)
-                metadatas.append({
-                    "source": doc['filename'],
-                    "chunk_index": i
-                })
-                documents_list.append(chunk)
+        with metrics.span("chunk", documents=len(documents)):
+            for doc in documents:
+                chunks = self.chunk_text(doc['content'])
+                for i, chunk in enumerate(chunks):
+                    ids.append(str(uuid.uuid4()))
+                    metadatas.append({
+                        "source": doc['filename'],
+                        "chunk_index": i
+                    })
+                    documents_list.append(chunk)
         
-        collection.add(
-            ids=ids,
-            embeddings=embeddings,
-            metadatas=metadatas,
-            documents=documents_list
-        )
+        embeddings = self.embed(documents_list)
+        
+        if self.index:
+            self._publish_documents(ids, embeddings, metadatas, documents_list, collection_name)
+        else:
+            with metrics.span("index", chunks=len(ids)):
+                self.create_collection(collection_name).add(
+                    ids=ids,
+                    embeddings=embeddings,
+                    metadatas=metadatas,
+                    documents=documents_list
+                )
+        self.search_cache.clear()
     
+    def _publish_documents(self, ids, embeddings, metadatas, documents_list, collection_name: str):
+        """Write into a staged copy of the index under the writer lock, then publish it atomically"""
+        with self.index.writer_lock():
+            version = self.index.begin_version()
+            try:
+                with metrics.span("index", chunks=len(ids), version=version):
+                    client = _open_client(self.index.staging_path(version))
+                    try:
+                        collection = self.create_collection(collection_name, client)
+                        # Re-ingesting a file replaces its chunks instead of duplicating them
+                        sources = sorted({metadata["source"] for metadata in metadatas})
+                        if sources:
+                            collection.delete(where={"source": {"$in": sources}})
+                        collection.add(
+                            ids=ids,
+                            embeddings=embeddings,
+                            metadatas=metadatas,
+                            documents=documents_list
+                        )
+                    finally:
+                        # Only the staging client is closed; self.client keeps serving reads
+                        _release_client(client)
+                self.index.publish(version)
+            except Exception:
+                self.index.abort(version)
+                raise
+        self.refresh(force=True)
+    
+    @profiled("vector_store_search")
     def search(self, query: str, n_results: int = 5, collection_name: str = "qa_documents"):
-        collection = self.create_collection(collection_name)
-        query_embedding = self.embedder.encode(query).tolist()
-        
-        results = collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results
-        )
+        self.refresh()
+        with self._reading() as (version, client):
+            # The version is part of the key, so a search that finishes after a swap can't
+            # cache its (older) results for searches on the new version
+            cache_key = make_key(version, query, n_results, collection_name)
+            cached = self.search_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
+            collection = self._read_collection(collection_name, client)
+            if collection is None:
+                return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+            query_embedding = self.query_embedding_cache.get(query)
+            if query_embedding is None:
+                query_embedding = self.embed([query])[0]
+                self.query_embedding_cache.put(query, query_embedding)
+            
+            with metrics.span("search", n_results=n_results):
+                started = time.perf_counter()
+                results = collection.query(
+                    query_embeddings=[query_embedding],
+                    n_results=n_results
+                )
+                metrics.CHROMA_QUERY_LATENCY.observe(time.perf_counter() - started)
         
-        return results
\ No newline at end of file
+        self.search_cache.put(cache_key, results)
+        return results
@@ -0,0 +1,195 @@
+import asyncio
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Allowed slowdown before a metric counts as a regression (0.25 = 25% worse than baseline)
+DEFAULT_TOLERANCE = 0.25
+# Tail percentiles move more between runs than the median, so p95/p99 get a wider tolerance
+DEFAULT_TAIL_TOLERANCE = 0.5
+# A latency slowdown smaller than this never counts as a regression, whatever the ratio
+MIN_LATENCY_REGRESSION_MS = 5.0
+# Measured passes per scenario (after a discarded warm-up pass); the median pass is compared
+DEFAULT_REPEATS = 3
+DEFAULT_WARMUP = 1
+
+WORDS = (
+    "checkout discount code cart total price shipping payment paypal credit card "
+    "form validation email name address required error message button submit "
+    "coupon expired invalid success banner summary quantity item remove update"
+).split()
+
+
+def synthetic_document(size_kb: int, seed: int = 0) -> str:
+    """Markdown-ish spec text of roughly size_kb kilobytes"""
+    rng = random.Random(seed)
+    target = size_kb * 1024
+    parts = []
+    length = 0
+    section = 1
+    while length < target:
+        heading = f"## Feature {section}: {rng.choice(WORDS).title()} {rng.choice(WORDS)}\n\n"
+        sentences = []
+        for _ in range(rng.randint(3, 8)):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(8, 20))]
+            sentences.append(" ".join(words).capitalize() + ".")
+        paragraph = heading + " ".join(sentences) + "\n\n"
+        parts.append(paragraph)
+        length += len(paragraph)
+        section += 1
+    return "".join(parts)
+
+
+def synthetic_corpus(num_docs: int, size_kb: int, seed: int = 0) -> List[Dict[str, str]]:
+    return [
+        {"filename": f"spec_{seed}_{i}.md", "content": synthetic_document(size_kb, seed * 1000 + i)}
+        for i in range(num_docs)
+    ]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile; values need not be sorted"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB (None where unsupported)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def summarize(latencies: List[float], errors: int, wall_seconds: float) -> dict:
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "throughput_rps": round(len(latencies) / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+    }
+
+
+async def drive(call: Callable[[int], Awaitable[bool]], total: int, concurrency: int) -> dict:
+    """Run call(i) for i in range(total) with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                ok = await call(i)
+            except Exception:
+                # A transport error is a failed request, not a reason to abort the run
+                ok = False
+            elapsed = time.perf_counter() - started
+        if ok:
+            latencies.append(elapsed)
+        else:
+            errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def median_summary(summaries: List[dict]) -> dict:
+    """Median of each latency/throughput metric over several passes; requests and errors are summed"""
+    merged = {
+        key: round(statistics.median(summary[key] for summary in summaries), 3)
+        for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")
+    }
+    merged["requests"] = sum(summary["requests"] for summary in summaries)
+    merged["errors"] = sum(summary["errors"] for summary in summaries)
+    merged["passes"] = len(summaries)
+    return merged
+
+
+async def repeat(run_pass: Callable[[], Awaitable[dict]], repeats: int = DEFAULT_REPEATS,
+                 warmup: int = DEFAULT_WARMUP) -> dict:
+    """Run a scenario pass `warmup` times (discarded), then `repeats` times, and summarize the median"""
+    for _ in range(warmup):
+        await run_pass()
+    return median_summary([await run_pass() for _ in range(max(1, repeats))])
+
+
+@contextmanager
+def scratch_dir(prefix: str):
+    """Work inside a temporary directory that is removed (with everything written there) on exit"""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix=prefix) as path:
+        os.chdir(path)
+        try:
+            yield path
+        finally:
+            os.chdir(previous)
+
+
+def load_baseline(path: str = BASELINE_FILE) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(results: dict, path: str = BASELINE_FILE):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE,
+            tail_tolerance: float = DEFAULT_TAIL_TOLERANCE,
+            min_latency_ms: float = MIN_LATENCY_REGRESSION_MS) -> List[str]:
+    """Return a human-readable line for each scenario metric that regressed past tolerance
+
+    Latency only regresses when it is both past its tolerance (tail_tolerance for
+    p95/p99) and at least min_latency_ms slower, so millisecond-level jitter on fast
+    endpoints doesn't fail the gate. peak_rss_mb is a process-lifetime high-water
+    mark, so callers record it once per run (under a "run" entry) rather than per scenario.
+    """
+    regressions = []
+    for scenario, current in results.items():
+        base = baseline.get(scenario)
+        if not base:
+            continue
+        for key, allowed, floor in (
+            ("p50_ms", tolerance, min_latency_ms),
+            ("p95_ms", tail_tolerance, min_latency_ms),
+            ("p99_ms", tail_tolerance, min_latency_ms),
+            ("peak_rss_mb", tolerance, 0.0),
+        ):
+            if not base.get(key) or current.get(key) is None:
+                continue
+            if current[key] > base[key] * (1 + allowed) and current[key] - base[key] > floor:
+                regressions.append(f"{scenario}: {key} {current[key]} > baseline {base[key]} (+{allowed:.0%})")
+        if base.get("throughput_rps") and current.get("throughput_rps", 0) < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{scenario}: throughput_rps {current['throughput_rps']} < baseline {base['throughput_rps']} (-{tolerance:.0%})"
+            )
+        if current.get("errors", 0) > base.get("errors", 0):
+            regressions.append(f"{scenario}: errors {current['errors']} > baseline {base.get('errors', 0)}")
+    return regressions
@@ -0,0 +1,196 @@
+import gzip
+import hashlib
+import os
+import time
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, gzip is always available
+    zstandard = None
+
+# Backend configuration
+API_BASE = os.getenv("QA_API_BASE", "http://localhost:8000")
+
+HEALTH_TTL = 10     # seconds a health check result is reused across reruns
+RESPONSE_TTL = 60   # seconds an idempotent generation response is reused
+UPLOAD_CHUNK_SIZE = 64 * 1024   # bytes read at a time when hashing a file
+UPLOAD_PART_SIZE = 4 * 1024 * 1024   # bytes per resumable upload part (before compression)
+UPLOAD_RETRIES = 5
+
+
+class BackendError(Exception):
+    """Backend answered with a non-200 status"""
+
+    def __init__(self, status_code: int, text: str):
+        super().__init__(f"Backend error {status_code}: {text}")
+        self.status_code = status_code
+        self.text = text
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """One pooled keep-alive session shared by every rerun and browser session"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _json_or_raise(response: requests.Response):
+    if response.status_code != 200:
+        raise BackendError(response.status_code, response.text)
+    return response.json()
+
+
+@st.cache_data(ttl=HEALTH_TTL, show_spinner=False)
+def check_backend():
+    """Check if backend is running"""
+    try:
+        response = get_session().get(f"{API_BASE}/health", timeout=5)
+        if response.status_code == 200:
+            return True, "✅ Backend connected"
+        else:
+            return False, f"❌ Backend error: {response.status_code}"
+    except requests.exceptions.ConnectionError:
+        return False, "❌ Backend not running - start it first!"
+    except Exception as e:
+        return False, f"❌ Error: {str(e)}"
+
+
+# Errors are raised rather than returned so that only successful responses are cached
+@st.cache_data(ttl=RESPONSE_TTL, show_spinner=False)
+def generate_test_cases(query: str) -> list:
+    response = get_session().post(f"{API_BASE}/generate-test-cases", params={"query": query}, timeout=30)
+    return _json_or_raise(response)["test_cases"]
+
+
+@st.cache_data(ttl=RESPONSE_TTL, show_spinner=False)
+def generate_script(test_case: dict, html_content: str) -> str:
+    response = get_session().post(
+        f"{API_BASE}/generate-script",
+        json={"test_case": test_case, "html_content": html_content},
+        timeout=30
+    )
+    return _json_or_raise(response).get("script", "")
+
+
+def _file_sha256(fileobj) -> str:
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(UPLOAD_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _with_retries(send):
+    """Retry a request on dropped connections/timeouts with exponential backoff"""
+    for attempt in range(UPLOAD_RETRIES):
+        try:
+            return send()
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt == UPLOAD_RETRIES - 1:
+                raise
+            time.sleep(0.5 * 2 ** attempt)
+
+
+def _resume_or_init(session, uploaded_file, sha256: str) -> dict:
+    """Reuse this browser session's unfinished upload of the same file, or start a new one
+
+    Returns the init response plus the part indexes the backend already has, and
+    the commit result if an earlier attempt committed but never saw the response.
+    """
+    uploads_in_progress = st.session_state.setdefault("uploads_in_progress", {})
+    key = f"{uploaded_file.name}:{uploaded_file.size}:{sha256}"
+    known = uploads_in_progress.get(key)
+    if known:
+        status = _with_retries(lambda: session.get(f"{API_BASE}/uploads/{known['upload_id']}", timeout=30))
+        if status.status_code == 200:
+            status = status.json()
+            return {
+                **known,
+                "key": key,
+                "received_parts": set(status["received_parts"]),
+                "committed": status.get("committed"),
+            }
+        # Expired: start over
+        uploads_in_progress.pop(key, None)
+
+    init = _json_or_raise(_with_retries(lambda: session.post(
+        f"{API_BASE}/uploads",
+        json={"filename": uploaded_file.name, "total_size": uploaded_file.size, "sha256": sha256},
+        timeout=30
+    )))
+    uploads_in_progress[key] = init
+    return {**init, "key": key, "received_parts": set()}
+
+
+def upload_file_chunked(uploaded_file, compress: bool = True) -> dict:
+    """Upload one file through the resumable init/part/commit protocol
+
+    The upload id is kept in st.session_state, so a later attempt at the
+    same file (after retries ran out) skips the parts the backend already
+    has instead of starting over.
+    """
+    session = get_session()
+    size = uploaded_file.size
+    init = _resume_or_init(session, uploaded_file, _file_sha256(uploaded_file))
+    upload_id = init["upload_id"]
+    if init.get("committed"):
+        st.session_state["uploads_in_progress"].pop(init["key"], None)
+        return init["committed"]
+    part_size = min(UPLOAD_PART_SIZE, init.get("max_part_size", UPLOAD_PART_SIZE))
+    total_parts = max(1, -(-size // part_size))
+
+    for index in range(total_parts):
+        if index in init["received_parts"]:
+            continue
+        uploaded_file.seek(index * part_size)
+        part = uploaded_file.read(part_size)
+        headers = {"X-Part-SHA256": hashlib.sha256(part).hexdigest()}
+        body = part
+        encodings = init.get("encodings", [])
+        if compress and zstandard and "zstd" in encodings:
+            body = zstandard.ZstdCompressor(level=3).compress(part)
+            headers["Content-Encoding"] = "zstd"
+        elif compress and "gzip" in encodings:
+            body = gzip.compress(part, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+
+        def send():
+            try:
+                return session.put(f"{API_BASE}/uploads/{upload_id}/parts/{index}", data=body, headers=headers, timeout=120)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                # The part may have landed before the connection dropped
+                status = session.get(f"{API_BASE}/uploads/{upload_id}", timeout=30)
+                if status.status_code == 200 and index in status.json()["received_parts"]:
+                    return None
+                raise
+
+        response = _with_retries(send)
+        if response is not None:
+            _json_or_raise(response)
+
+    # Commit is idempotent on the backend, so retrying after a lost response returns the same result
+    result = _json_or_raise(_with_retries(lambda: session.post(
+        f"{API_BASE}/uploads/{upload_id}/commit",
+        json={"total_parts": total_parts},
+        timeout=300
+    )))
+    st.session_state["uploads_in_progress"].pop(init["key"], None)
+    return result
+
+
+def upload_documents(uploaded_files) -> dict:
+    """Upload a batch of files one part at a time; memory use is bounded by the part size"""
+    processed_files = [upload_file_chunked(doc)["filename"] for doc in uploaded_files]
+    return {
+        "status": "Knowledge Base Built",
+        "documents_processed": len(processed_files),
+        "processed_files": processed_files,
+        "message": f"Successfully processed {len(processed_files)} files"
+    }
@@ -2,21 +2,8 @@ import streamlit as st
 import requests
 import time
 
-# Backend configuration
-API_BASE = "http://localhost:8000"
-
-def check_backend():
-    """Check if backend is running"""
-    try:
-        response = requests.get(f"{API_BASE}/health", timeout=5)
-        if response.status_code == 200:
-            return True, "✅ Backend connected"
-        else:
-            return False, f"❌ Backend error: {response.status_code}"
-    except requests.exceptions.ConnectionError:
-        return False, "❌ Backend not running - start it first!"
-    except Exception as e:
-        return False, f"❌ Error: {str(e)}"
+import api_client
+from api_client import BackendError, check_backend
 
 st.set_page_config(page_title="Autonomous QA Agent", layout="wide")
 st.title("🤖 Autonomous QA Agent")
@@ -74,21 +61,13 @@ with tab1:
         if support_docs:
             with st.spinner("Building knowledge base..."):
                 try:
-                    # Prepare files for upload
-                    files = []
-                    for doc in support_docs:
-                        files.append(("files", (doc.name, doc.getvalue(), doc.type)))
-                    
-                    # Send request to backend
-                    response = requests.post(f"{API_BASE}/ingest-documents", files=files)
-                    
-                    if response.status_code == 200:
-                        result = response.json()
-                        st.success("✅ Knowledge base built successfully!")
-                        st.json(result)
-                    else:
-                        st.error(f"Backend error {response.status_code}: {response.text}")
+                    # Resumable part-by-part upload, so large batches survive dropped connections
+                    result = api_client.upload_documents(support_docs)
+                    st.success("✅ Knowledge base built successfully!")
+                    st.json(result)
                         
+                except BackendError as e:
+                    st.error(str(e))
                 except requests.exceptions.ConnectionError:
                     st.error("❌ Cannot connect to backend. Make sure it's running on port 8000.")
                 except requests.exceptions.RequestException as e:
@@ -110,12 +89,10 @@ with tab2:
     if st.button("🎯 Generate Test Cases"):
         with st.spinner("Generating test cases..."):
             try:
-                response = requests.post(f"{API_BASE}/generate-test-cases", params={"query": query})
-                if response.status_code == 200:
-                    st.session_state.test_cases = response.json()["test_cases"]
-                    st.success(f"✅ Generated {len(st.session_state.test_cases)} test cases!")
-                else:
-                    st.error(f"Error: {response.text}")
+                st.session_state.test_cases = api_client.generate_test_cases(query)
+                st.success(f"✅ Generated {len(st.session_state.test_cases)} test cases!")
+            except BackendError as e:
+                st.error(f"Error: {e.text}")
             except Exception as e:
                 st.error(f"Failed to connect to backend: {e}")
     
@@ -141,57 +118,42 @@ with tab3:
             
             with st.spinner("Generating Selenium script..."):
                 try:
-                    # FIXED: Send proper structured data
-                    request_data = {
-                        "test_case": {
-                            "test_id": selected_tc['test_id'],
-                            "feature": selected_tc['feature'],
-                            "test_scenario": selected_tc['test_scenario'],
-                            "expected_result": selected_tc['expected_result'],
-                            "grounded_in": selected_tc['grounded_in']
-                        },
-                        "html_content": st.session_state.html_content
+                    test_case = {
+                        "test_id": selected_tc['test_id'],
+                        "feature": selected_tc['feature'],
+                        "test_scenario": selected_tc['test_scenario'],
+                        "expected_result": selected_tc['expected_result'],
+                        "grounded_in": selected_tc['grounded_in']
                     }
+                    script = api_client.generate_script(test_case, st.session_state.html_content)
                     
-                    # FIXED: Add proper headers and timeout
-                    response = requests.post(
-                        f"{API_BASE}/generate-script", 
-                        json=request_data,
-                        headers={"Content-Type": "application/json"},
-                        timeout=30
-                    )
-                    
-                    if response.status_code == 200:
-                        result = response.json()
-                        script = result.get("script", "")
+                    if script:
+                        st.success("✅ Script generated successfully!")
+                        
+                        st.subheader("Generated Selenium Script")
+                        st.code(script, language='python')
+                        
+                        # Download button
+                        st.download_button(
+                            label="📥 Download Script",
+                            data=script,
+                            file_name=f"{selected_tc['test_id']}_selenium.py",
+                            mime="text/x-python"
+                        )
                         
-                        if script:
-                            st.success("✅ Script generated successfully!")
-                            
-                            st.subheader("Generated Selenium Script")
-                            st.code(script, language='python')
-                            
-                            # Download button
-                            st.download_button(
-                                label="📥 Download Script",
-                                data=script,
-                                file_name=f"{selected_tc['test_id']}_selenium.py",
-                                mime="text/x-python"
-                            )
-                            
-                            # Instructions for running
-                            st.info(
-                                f"**To run this test:**\n"
-                                f"1. Save the script as `{selected_tc['test_id']}_selenium.py`\n"
-                                f"2. Make sure `test_page.html` is in the same folder\n"
-                                f"3. Run: `python {selected_tc['test_id']}_selenium.py`\n"
-                                f"4. Or use: `python run_tests.py` to run all tests"
-                            )
-                        else:
-                            st.error("❌ Script was generated but is empty")
+                        # Instructions for running
+                        st.info(
+                            f"**To run this test:**\n"
+                            f"1. Save the script as `{selected_tc['test_id']}_selenium.py`\n"
+                            f"2. Make sure `test_page.html` is in the same folder\n"
+                            f"3. Run: `python {selected_tc['test_id']}_selenium.py`\n"
+                            f"4. Or use: `python run_tests.py` to run all tests"
+                        )
                     else:
-                        st.error(f"❌ Backend Error {response.status_code}: {response.text}")
+                        st.error("❌ Script was generated but is empty")
                         
+                except BackendError as e:
+                    st.error(f"❌ Backend Error {e.status_code}: {e.text}")
                 except requests.exceptions.ConnectionError:
                     st.error("❌ Cannot connect to backend. Make sure it's running on port 8000.")
                 except requests.exceptions.Timeout:
@@ -0,0 +1,150 @@
+import argparse
+import asyncio
+import os
+import sys
+
+from benchmarks import harness
+
+# Corpus sizes: (number of documents, size of each document in KB)
+CORPUS_SIZES = {
+    "small": (5, 4),
+    "medium": (20, 32),
+    "large": (50, 256),
+}
+
+QUERIES = [
+    "Generate test cases for discount code validation",
+    "Generate test cases for form validation and error messages",
+    "Generate test cases for payment method selection",
+]
+
+FEATURES = ["Discount Code", "Form Validation", "Payment Method", "General"]
+
+
+def load_app():
+    """Import the FastAPI app; call inside harness.scratch_dir so ingestion doesn't touch ./data"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from app.main import app
+    return app
+
+
+async def measure(scenario) -> dict:
+    """Await a scenario and note how much it raised the process's peak RSS (informational only)"""
+    before = harness.peak_rss_mb()
+    result = await scenario
+    after = harness.peak_rss_mb()
+    result["rss_growth_mb"] = round(after - before, 1) if before is not None else None
+    return result
+
+
+async def run_scenarios(app, sizes, requests_per_scenario: int, concurrency: int,
+                        repeats: int = harness.DEFAULT_REPEATS, warmup: int = harness.DEFAULT_WARMUP) -> dict:
+    import httpx
+
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_page.html")) as f:
+        html_content = f.read()
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for size in sizes:
+            num_docs, size_kb = CORPUS_SIZES[size]
+            corpus = harness.synthetic_corpus(num_docs, size_kb)
+
+            async def ingest(i):
+                files = [("files", (doc["filename"], doc["content"].encode("utf-8"), "text/markdown")) for doc in corpus]
+                response = await client.post("/ingest-documents", files=files)
+                return response.status_code == 200
+
+            # Ingesting a whole corpus is heavy, so it runs fewer times than the generation calls
+            ingest_runs = max(1, requests_per_scenario // 10)
+            results[f"ingest_{size}"] = await measure(harness.repeat(
+                lambda: harness.drive(ingest, ingest_runs, min(concurrency, ingest_runs)), repeats, warmup
+            ))
+
+        async def test_cases(i):
+            response = await client.post("/generate-test-cases", params={"query": QUERIES[i % len(QUERIES)]})
+            return response.status_code == 200
+
+        results["generate_test_cases"] = await measure(harness.repeat(
+            lambda: harness.drive(test_cases, requests_per_scenario, concurrency), repeats, warmup
+        ))
+
+        async def script(i):
+            test_case = {
+                "test_id": f"TC-{i:03d}",
+                "feature": FEATURES[i % len(FEATURES)],
+                "test_scenario": "Benchmark scenario",
+                "expected_result": "Benchmark result",
+                "grounded_in": "product_specs.md",
+            }
+            response = await client.post("/generate-script", json={"test_case": test_case, "html_content": html_content})
+            return response.status_code == 200
+
+        results["generate_script"] = await measure(harness.repeat(
+            lambda: harness.drive(script, requests_per_scenario, concurrency), repeats, warmup
+        ))
+
+    # ru_maxrss only ever grows, so the peak is compared once for the whole run
+    results["run"] = {"peak_rss_mb": harness.peak_rss_mb()}
+    return results
+
+
+def print_results(results: dict):
+    print(f"{'scenario':<24}{'reqs':>6}{'errs':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rps':>10}{'+rss MB':>10}")
+    for scenario, r in results.items():
+        if scenario == "run":
+            continue
+        rss = f"{r['rss_growth_mb']:.1f}" if r.get("rss_growth_mb") is not None else "n/a"
+        print(
+            f"{scenario:<24}{r['requests']:>6}{r['errors']:>6}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}"
+            f"{r['p99_ms']:>10.2f}{r['throughput_rps']:>10.2f}{rss:>10}"
+        )
+    peak = results["run"]["peak_rss_mb"]
+    print(f"Peak RSS for the run: {peak:.1f} MB" if peak is not None else "Peak RSS for the run: n/a")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load and benchmark the backend in-process")
+    parser.add_argument("--sizes", nargs="+", choices=list(CORPUS_SIZES), default=["small", "medium"])
+    parser.add_argument("--requests", type=int, default=200, help="requests per generation scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--repeats", type=int, default=harness.DEFAULT_REPEATS, help="measured passes per scenario (median is compared)")
+    parser.add_argument("--warmup", type=int, default=harness.DEFAULT_WARMUP, help="discarded warm-up passes per scenario")
+    parser.add_argument("--tolerance", type=float, default=harness.DEFAULT_TOLERANCE)
+    parser.add_argument("--tail-tolerance", type=float, default=harness.DEFAULT_TAIL_TOLERANCE, help="tolerance for p95/p99")
+    parser.add_argument("--baseline", default=harness.BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    args = parser.parse_args()
+
+    print("📈 Starting backend benchmark")
+    print("=" * 60)
+    with harness.scratch_dir("qa-bench-"):
+        app = load_app()
+        results = asyncio.run(run_scenarios(
+            app, args.sizes, args.requests, args.concurrency, max(1, args.repeats), max(0, args.warmup)
+        ))
+    print_results(results)
+    print("=" * 60)
+
+    if args.update_baseline:
+        harness.save_baseline(results, args.baseline)
+        print(f"💾 Baseline saved to {args.baseline}")
+        return
+
+    baseline = harness.load_baseline(args.baseline)
+    if not baseline:
+        print("ℹ️  No baseline found - run with --update-baseline to record one")
+        return
+
+    regressions = harness.compare(results, baseline, args.tolerance, args.tail_tolerance)
+    if regressions:
+        print("❌ Performance regressions:")
+        for line in regressions:
+            print(f"   - {line}")
+        sys.exit(1)
+    print("✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import argparse
+import asyncio
+import contextlib
+import difflib
+import json
+import os
+import sys
+
+from benchmarks import harness
+
+REPLAY_BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "replay_baseline.json")
+
+
+def load_app():
+    """Import the FastAPI app with request recording off; call inside harness.scratch_dir"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.environ.pop("QA_RECORD_REQUESTS", None)
+    from app.main import app
+    return app
+
+
+async def replay_pass(client, requests_list, concurrency: int):
+    """Replay every request once; returns the latency summary and each response body in log order"""
+    outputs = [None] * len(requests_list)
+
+    async def call(i):
+        response = await client.request(**requests_list[i])
+        try:
+            outputs[i] = response.json()
+        except ValueError:
+            outputs[i] = response.text
+        return response.status_code == 200
+
+    summary = await harness.drive(call, len(requests_list), concurrency)
+    return summary, outputs
+
+
+async def run(log_path: str, base_url, repeats: int, concurrency: int):
+    import httpx
+    from app import replay
+
+    entries = replay.load_log(log_path)
+    if not entries:
+        return entries, {}, []
+    requests_list = list(replay.iter_requests(entries))
+
+    if base_url:
+        client = httpx.AsyncClient(base_url=base_url, timeout=None)
+    else:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=load_app()), base_url="http://replay", timeout=None)
+
+    results = {}
+    async with client:
+        # The first pass sees cold caches; it is reported but, being a single noisy pass, not gated
+        results["replay_cold"], outputs = await replay_pass(client, requests_list, concurrency)
+        # Later passes show the warmed-up latency; their median is compared to the baseline
+        warm = []
+        for _ in range(repeats):
+            summary, outputs = await replay_pass(client, requests_list, concurrency)
+            warm.append(summary)
+        results["replay_warm"] = harness.median_summary(warm)
+    if not base_url:
+        # ru_maxrss only ever grows, so the peak is compared once for the whole run. Against
+        # --base-url it would be this client's memory, not the server's, so it is skipped
+        results["run"] = {"peak_rss_mb": harness.peak_rss_mb()}
+    return entries, results, outputs
+
+
+def diff_outputs(entries, outputs, baseline_outputs, limit: int = 3):
+    """Return (number of responses that differ from the baseline, printable diffs for the first few)"""
+    mismatches = 0
+    diffs = []
+    for entry, current, expected in zip(entries, outputs, baseline_outputs):
+        if current == expected:
+            continue
+        mismatches += 1
+        if len(diffs) < limit:
+            before = json.dumps(expected, indent=2, sort_keys=True).splitlines()
+            after = json.dumps(current, indent=2, sort_keys=True).splitlines()
+            diff = "\n".join(difflib.unified_diff(before, after, "baseline", "current", lineterm="", n=1))
+            diffs.append(f"{entry['endpoint']}\n{diff}")
+    return mismatches, diffs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded JSONL request log for warm-up and regression checks")
+    parser.add_argument("log", help="JSONL request log (record one with QA_RECORD_REQUESTS=path)")
+    parser.add_argument("--base-url", help="replay against a running backend instead of in-process")
+    parser.add_argument("--repeats", type=int, default=harness.DEFAULT_REPEATS, help="warm passes after the cold one (median is compared)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--tolerance", type=float, default=harness.DEFAULT_TOLERANCE)
+    parser.add_argument("--tail-tolerance", type=float, default=harness.DEFAULT_TAIL_TOLERANCE, help="tolerance for p95/p99")
+    parser.add_argument("--baseline", default=REPLAY_BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    args = parser.parse_args()
+
+    print("🔁 Replaying request log")
+    print("=" * 60)
+    log_path = os.path.abspath(args.log)
+    # In-process replays run the app in a temporary directory that is removed afterwards
+    workdir = contextlib.nullcontext() if args.base_url else harness.scratch_dir("qa-replay-")
+    with workdir:
+        entries, results, outputs = asyncio.run(run(log_path, args.base_url, max(1, args.repeats), args.concurrency))
+    if not entries:
+        print(f"ℹ️  No replayable requests in {args.log}")
+        return
+
+    print(f"📋 {len(entries)} requests")
+    for name, r in results.items():
+        if name == "run":
+            continue
+        print(
+            f"   {name:<16} p50 {r['p50_ms']:.2f} ms | p95 {r['p95_ms']:.2f} ms | p99 {r['p99_ms']:.2f} ms"
+            f" | {r['throughput_rps']:.2f} req/s | errors {r['errors']}"
+        )
+    print("=" * 60)
+
+    if args.update_baseline:
+        harness.save_baseline({"results": results, "outputs": outputs}, args.baseline)
+        print(f"💾 Baseline saved to {args.baseline}")
+        return
+
+    baseline = harness.load_baseline(args.baseline)
+    if not baseline:
+        print("ℹ️  No baseline found - run with --update-baseline to record one")
+        return
+
+    failed = False
+    gated = {name: r for name, r in results.items() if name != "replay_cold"}
+    regressions = harness.compare(gated, baseline.get("results", {}), args.tolerance, args.tail_tolerance)
+    if regressions:
+        failed = True
+        print("❌ Performance regressions:")
+        for line in regressions:
+            print(f"   - {line}")
+
+    baseline_outputs = baseline.get("outputs", [])
+    if len(baseline_outputs) != len(outputs):
+        failed = True
+        print(f"❌ Baseline has {len(baseline_outputs)} responses, this log produced {len(outputs)}")
+    else:
+        mismatches, diffs = diff_outputs(entries, outputs, baseline_outputs)
+        if mismatches:
+            failed = True
+            print(f"❌ {mismatches} response(s) differ from baseline:")
+            for diff in diffs:
+                print(diff)
+
+    if failed:
+        sys.exit(1)
+    print("✅ Latency and outputs match baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import asyncio
+import os
+
+from benchmarks import harness
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 11))
+    assert harness.percentile(values, 50) == 5
+    assert harness.percentile(values, 95) == 10
+    assert harness.percentile([3, 1, 2], 0) == 1
+    assert harness.percentile([], 99) == 0.0
+
+
+def test_compare_flags_latency_throughput_and_errors():
+    baseline = {"scenario": {"p50_ms": 20, "p95_ms": 40, "p99_ms": 60, "throughput_rps": 100, "errors": 0}}
+    current = {"scenario": {"p50_ms": 30, "p95_ms": 56, "p99_ms": 60, "throughput_rps": 70, "errors": 1}}
+
+    regressions = harness.compare(current, baseline, tolerance=0.25)
+
+    assert any("p50_ms" in line for line in regressions)
+    assert not any("p95_ms" in line for line in regressions)
+    assert any("throughput_rps" in line for line in regressions)
+    assert any("errors" in line for line in regressions)
+
+
+def test_compare_within_tolerance_and_run_level_rss():
+    baseline = {"scenario": {"p50_ms": 10, "throughput_rps": 100, "errors": 0}, "run": {"peak_rss_mb": 100}}
+    current = {"scenario": {"p50_ms": 12, "throughput_rps": 80, "errors": 0}, "run": {"peak_rss_mb": 130}}
+
+    regressions = harness.compare(current, baseline, tolerance=0.25)
+
+    assert regressions == ["run: peak_rss_mb 130 > baseline 100 (+25%)"]
+
+
+def test_compare_ignores_small_absolute_slowdowns_and_uses_tail_tolerance():
+    baseline = {"scenario": {"p50_ms": 2, "p95_ms": 30, "p99_ms": 36}}
+    current = {"scenario": {"p50_ms": 4, "p95_ms": 40, "p99_ms": 60}}
+
+    regressions = harness.compare(current, baseline, tolerance=0.25, tail_tolerance=0.5)
+
+    # p50 doubled but only by 2 ms; p95 is within the tail tolerance; p99 is past both
+    assert regressions == ["scenario: p99_ms 60 > baseline 36 (+50%)"]
+
+
+def test_repeat_discards_warmup_and_reports_the_median():
+    passes = iter([
+        {"requests": 1, "errors": 1, "p50_ms": 900, "p95_ms": 900, "p99_ms": 900, "throughput_rps": 1},
+        {"requests": 10, "errors": 0, "p50_ms": 10, "p95_ms": 20, "p99_ms": 30, "throughput_rps": 50},
+        {"requests": 10, "errors": 1, "p50_ms": 12, "p95_ms": 90, "p99_ms": 95, "throughput_rps": 40},
+        {"requests": 10, "errors": 0, "p50_ms": 11, "p95_ms": 22, "p99_ms": 31, "throughput_rps": 45},
+    ])
+
+    async def run_pass():
+        return next(passes)
+
+    summary = asyncio.run(harness.repeat(run_pass, repeats=3, warmup=1))
+
+    assert summary == {
+        "p50_ms": 11, "p95_ms": 22, "p99_ms": 31, "throughput_rps": 45,
+        "requests": 30, "errors": 1, "passes": 3,
+    }
+
+
+def test_scratch_dir_is_removed(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    with harness.scratch_dir("qa-test-") as path:
+        os.makedirs("data")
+        assert os.getcwd() == os.path.realpath(path)
+
+    assert os.getcwd() == str(tmp_path)
+    assert not os.path.exists(path)
+
+
+def test_drive_counts_exceptions_as_errors():
+    async def call(i):
+        if i % 2:
+            raise ConnectionError("dropped")
+        return True
+
+    summary = asyncio.run(harness.drive(call, total=10, concurrency=3))
+
+    assert summary["requests"] == 10
+    assert summary["errors"] == 5
@@ -0,0 +1,88 @@
+import os
+
+from app.index_store import IndexVersions
+
+
+def _publish(index, content):
+    with index.writer_lock():
+        version = index.begin_version()
+        with open(os.path.join(index.staging_path(version), "data"), "w") as f:
+            f.write(content)
+        index.publish(version)
+    return version
+
+
+def test_ensure_published_initializes_before_publishing(tmp_path):
+    index = IndexVersions(str(tmp_path), keep=3)
+    seen = []
+
+    def initialize(path):
+        seen.append(path)
+        with open(os.path.join(path, "chroma.sqlite3"), "w") as f:
+            f.write("initialized")
+
+    index.ensure_published(initialize)
+    index.ensure_published(initialize)
+
+    assert index.current() == "v000001"
+    assert seen == [index.staging_path("v000001")]
+    assert os.listdir(index.path("v000001")) == ["chroma.sqlite3"]
+
+
+def test_failed_initialize_publishes_nothing(tmp_path):
+    index = IndexVersions(str(tmp_path), keep=3)
+
+    def initialize(path):
+        raise RuntimeError("boom")
+
+    try:
+        index.ensure_published(initialize)
+    except RuntimeError:
+        pass
+
+    assert index.current() is None
+    assert os.listdir(index.versions_dir) == []
+
+
+def test_publish_copies_current_and_prunes_old_versions(tmp_path):
+    index = IndexVersions(str(tmp_path), keep=2)
+
+    for n in range(4):
+        _publish(index, f"version {n}")
+
+    assert index.current() == "v000004"
+    assert index.list_versions() == ["v000003", "v000004"]
+    with open(os.path.join(index.path("v000004"), "data")) as f:
+        assert f.read() == "version 3"
+
+
+def test_prune_keeps_versions_held_by_live_readers(tmp_path):
+    index = IndexVersions(str(tmp_path), keep=1)
+    _publish(index, "first")
+    index.hold(f"{os.getpid()}-live", ["v000001"])
+    index.hold("999999999-dead", ["v000001"])
+
+    _publish(index, "second")
+
+    assert index.list_versions() == ["v000001", "v000002"]
+    # The dead reader's lease is dropped while collecting held versions
+    assert os.listdir(index.readers_dir) == [f"{os.getpid()}-live"]
+
+    index.release(f"{os.getpid()}-live")
+    index.prune()
+
+    assert index.list_versions() == ["v000002"]
+
+
+def test_one_reader_can_hold_several_versions(tmp_path):
+    index = IndexVersions(str(tmp_path), keep=1)
+    reader_id = f"{os.getpid()}-reader"
+    _publish(index, "first")
+    index.hold(reader_id, ["v000001"])
+    _publish(index, "second")
+    # Swapped to v000002 while searches are still running on v000001
+    index.hold(reader_id, ["v000001", "v000002"])
+
+    _publish(index, "third")
+
+    assert index.list_versions() == ["v000001", "v000002", "v000003"]
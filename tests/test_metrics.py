@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+from app import metrics
+
+
+def test_label_values_are_escaped():
+    counter = metrics.Counter("qa_test_total", "test")
+    counter.inc(endpoint='a\\b"c\nd')
+
+    assert counter.render()[-1] == 'qa_test_total{endpoint="a\\\\b\\"c\\nd"} 1.0'
+
+
+def test_endpoint_label_uses_route_template_or_unmatched():
+    assert metrics.endpoint_label({"route": SimpleNamespace(path="/uploads/{upload_id}")}) == "/uploads/{upload_id}"
+    assert metrics.endpoint_label({}) == "unmatched"
+
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    histogram = metrics.Histogram("qa_test_seconds", "test", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, stage="embed")
+
+    lines = histogram.render(const_labels=(("worker", "7"),))
+
+    assert lines[2:] == [
+        'qa_test_seconds_bucket{worker="7",stage="embed",le="0.1"} 1',
+        'qa_test_seconds_bucket{worker="7",stage="embed",le="1.0"} 2',
+        'qa_test_seconds_bucket{worker="7",stage="embed",le="+Inf"} 3',
+        'qa_test_seconds_sum{worker="7",stage="embed"} 5.55',
+        'qa_test_seconds_count{worker="7",stage="embed"} 3',
+    ]
+
+
+def test_trace_store_evicts_oldest():
+    store = metrics.TraceStore(max_traces=2)
+    traces = [metrics.Trace(f"request-{n}") for n in range(3)]
+    for trace in traces:
+        store.add(trace)
+
+    assert store.get(traces[0].trace_id) is None
+    assert [t["name"] for t in store.recent()] == ["request-2", "request-1"]
+
+
+def test_spans_nest_inside_the_current_trace():
+    with metrics.start_trace("POST /ingest-documents") as trace:
+        with metrics.span("upload", files=2):
+            with metrics.span("chunk"):
+                pass
+
+    spans = metrics.traces.get(trace.trace_id)["spans"]
+
+    # Spans are appended as they finish, so the inner one comes first
+    assert [(s["stage"], s["depth"]) for s in spans] == [("chunk", 1), ("upload", 0)]
+    assert spans[1]["files"] == 2
+    assert spans[1]["duration_ms"] >= spans[0]["duration_ms"]
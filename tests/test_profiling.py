@@ -0,0 +1,87 @@
+import os
+import time
+
+import pytest
+
+from app import profiling
+
+
+@pytest.fixture(autouse=True)
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.delenv("QA_PROFILE", raising=False)
+    monkeypatch.delenv("QA_PROFILE_ALLOW_HEADER", raising=False)
+    return tmp_path
+
+
+def _touch(directory, filename, mtime):
+    path = directory / filename
+    path.write_text(filename)
+    os.utime(path, (mtime, mtime))
+
+
+def test_header_is_ignored_unless_allowed(monkeypatch):
+    assert profiling.header_mode("1") is None
+
+    monkeypatch.setenv("QA_PROFILE_ALLOW_HEADER", "1")
+
+    assert profiling.header_mode("sample") == "sample"
+    assert profiling.header_mode("1") == "cprofile"
+    assert profiling.header_mode("off") is None
+
+
+def test_prune_keeps_newest_runs(profile_dir):
+    now = time.time()
+    for n, run in enumerate(["search-a", "search-b", "search-c"]):
+        for suffix in (".prof", ".txt", ".alloc.txt"):
+            _touch(profile_dir, run + suffix, now + n)
+
+    profiling.prune_profiles(keep=2)
+
+    assert sorted(os.listdir(profile_dir)) == [
+        "search-b.alloc.txt", "search-b.prof", "search-b.txt",
+        "search-c.alloc.txt", "search-c.prof", "search-c.txt",
+    ]
+
+
+def test_list_profiles_newest_first(profile_dir):
+    now = time.time()
+    _touch(profile_dir, "vector_store_search-1.prof", now)
+    _touch(profile_dir, "generate_script-1.prof", now - 10)
+    _touch(profile_dir, "ingest_documents-1.prof", now + 10)
+
+    names = [p["name"] for p in profiling.list_profiles()]
+
+    assert names == ["ingest_documents-1.prof", "vector_store_search-1.prof", "generate_script-1.prof"]
+
+
+def test_profile_path_refuses_traversal_and_disabled(profile_dir, monkeypatch):
+    _touch(profile_dir, "run.prof", time.time())
+
+    assert profiling.profile_path("run.prof") is None
+
+    monkeypatch.setenv("QA_PROFILE", "1")
+
+    assert profiling.profile_path("run.prof") == str(profile_dir / "run.prof")
+    assert profiling.profile_path("../run.prof") is None
+    assert profiling.profile_path("..") is None
+    assert profiling.profile_path("missing.prof") is None
+
+
+def test_profiled_writes_one_run_for_nested_sections(profile_dir, monkeypatch):
+    monkeypatch.setenv("QA_PROFILE", "cprofile")
+
+    @profiling.profiled("outer")
+    def outer():
+        # Nested sections fold into the one already running
+        return inner() + 1
+
+    @profiling.profiled("inner")
+    def inner():
+        return 1
+
+    assert outer() == 2
+    profiling._writer.submit(lambda: None).result()
+
+    runs = {name.split("-", 1)[0] for name in os.listdir(profile_dir)}
+    assert runs == {"outer"}
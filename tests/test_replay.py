@@ -0,0 +1,46 @@
+import json
+
+from app import replay
+
+
+def test_recorded_requests_load_back(tmp_path, monkeypatch):
+    log = tmp_path / "requests_log.jsonl"
+    monkeypatch.setenv("QA_RECORD_REQUESTS", str(log))
+
+    replay.record("/generate-test-cases", params={"query": "discount codes"})
+    with replay.replaying():
+        replay.record("/generate-test-cases", params={"query": "not recorded"})
+    replay.record("/generate-script", body={"test_case": {"test_id": "TC-001"}})
+    replay.flush_records()
+
+    entries = replay.load_log(str(log))
+
+    assert [entry["endpoint"] for entry in entries] == ["/generate-test-cases", "/generate-script"]
+    assert entries[0]["params"] == {"query": "discount codes"}
+    assert entries[1]["json"] == {"test_case": {"test_id": "TC-001"}}
+
+
+def test_load_log_skips_unrecognised_lines(tmp_path):
+    log = tmp_path / "mixed.jsonl"
+    log.write_text("\n".join([
+        json.dumps({"request_id": "user-001", "title": "not a request"}),
+        "not json",
+        "",
+        json.dumps({"endpoint": "/generate-test-cases", "params": {"query": "q"}}),
+    ]))
+
+    entries = replay.load_log(str(log))
+
+    assert entries == [{"endpoint": "/generate-test-cases", "params": {"query": "q"}, "json": {}}]
+
+
+def test_iter_requests_builds_client_kwargs():
+    entries = [
+        {"endpoint": "/generate-test-cases", "params": {"query": "q"}, "json": {}},
+        {"endpoint": "/generate-script", "params": {}, "json": {"test_case": {}}},
+    ]
+
+    assert list(replay.iter_requests(entries)) == [
+        {"method": "POST", "url": "/generate-test-cases", "params": {"query": "q"}},
+        {"method": "POST", "url": "/generate-script", "json": {"test_case": {}}},
+    ]
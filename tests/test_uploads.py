@@ -0,0 +1,237 @@
+import asyncio
+import gzip
+import hashlib
+import os
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("aiofiles")
+
+from fastapi import HTTPException
+
+from app import uploads
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", str(tmp_path / ".uploads"))
+    return tmp_path
+
+
+async def _body(data: bytes, chunk_size: int = 1000):
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+
+def write(upload_id, index, data, encoding="identity", sha256=None):
+    return asyncio.run(uploads.write_part(upload_id, index, _body(data), encoding, sha256))
+
+
+def sha(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def test_round_trip_with_gzip_parts(data_dir):
+    content = os.urandom(5000) + b"spec " * 2000
+    upload = uploads.init_upload("big spec.md", len(content), sha(content))
+    parts = [content[:6000], content[6000:]]
+
+    write(upload["upload_id"], 0, parts[0], sha256=sha(parts[0]))
+    write(upload["upload_id"], 1, gzip.compress(parts[1]), "gzip", sha(parts[1]))
+    assert uploads.upload_status(upload["upload_id"])["received_parts"] == [0, 1]
+
+    result = uploads.commit_upload(upload["upload_id"], total_parts=2)
+
+    assert result["filename"] == "big_spec.md"
+    assert (data_dir / "big_spec.md").read_bytes() == content
+    assert uploads.upload_status(upload["upload_id"])["received_parts"] == []
+
+
+def test_repeated_commit_returns_first_result():
+    upload = uploads.init_upload("a.txt")
+    write(upload["upload_id"], 0, b"content")
+
+    first = uploads.commit_upload(upload["upload_id"], total_parts=1)
+    # The retry after a lost response finds the parts gone but the commit recorded
+    again = uploads.commit_upload(upload["upload_id"], total_parts=1)
+
+    assert again == first
+    assert uploads.upload_status(upload["upload_id"])["committed"] == first
+    with pytest.raises(HTTPException) as exc:
+        write(upload["upload_id"], 0, b"late part")
+    assert exc.value.status_code == 409
+
+
+def test_resent_part_replaces_previous_one(data_dir):
+    upload = uploads.init_upload("a.txt")
+    write(upload["upload_id"], 0, b"first attempt")
+    write(upload["upload_id"], 0, b"second")
+
+    uploads.commit_upload(upload["upload_id"], total_parts=1)
+
+    assert (data_dir / "a.txt").read_bytes() == b"second"
+
+
+def test_commit_with_missing_parts_is_409():
+    upload = uploads.init_upload("a.txt")
+    write(upload["upload_id"], 0, b"a")
+    write(upload["upload_id"], 2, b"c")
+
+    with pytest.raises(HTTPException) as exc:
+        uploads.commit_upload(upload["upload_id"])
+
+    assert exc.value.status_code == 409
+    assert exc.value.detail["missing_parts"] == [1]
+
+
+@pytest.mark.parametrize("index", [-1, 2_000_000_000])
+def test_part_index_out_of_range_is_400(index):
+    upload = uploads.init_upload("a.txt")
+
+    with pytest.raises(HTTPException) as exc:
+        write(upload["upload_id"], index, b"a")
+
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.parametrize("total_parts", [0, 10 ** 10])
+def test_commit_total_parts_out_of_range_is_400(total_parts):
+    upload = uploads.init_upload("a.txt")
+    write(upload["upload_id"], 0, b"a")
+
+    with pytest.raises(HTTPException) as exc:
+        uploads.commit_upload(upload["upload_id"], total_parts=total_parts)
+
+    assert exc.value.status_code == 400
+
+
+def test_missing_parts_are_found_from_gaps():
+    assert uploads._missing_parts([0, 2, 5, 9], 8) == [1, 3, 4, 6, 7]
+    assert uploads._missing_parts([], 10_000, limit=3) == [0, 1, 2]
+    assert uploads._missing_parts([0, 1, 2], 3) == []
+
+
+@pytest.mark.parametrize("declared", [{"total_size": 99}, {"sha256": "0" * 64}])
+def test_commit_size_or_hash_mismatch_is_422(declared):
+    upload = uploads.init_upload("a.txt", **declared)
+    write(upload["upload_id"], 0, b"content")
+
+    with pytest.raises(HTTPException) as exc:
+        uploads.commit_upload(upload["upload_id"], total_parts=1)
+
+    assert exc.value.status_code == 422
+
+
+def test_part_hash_mismatch_is_422_and_leaves_no_part():
+    upload = uploads.init_upload("a.txt")
+
+    with pytest.raises(HTTPException) as exc:
+        write(upload["upload_id"], 0, b"content", sha256="0" * 64)
+
+    assert exc.value.status_code == 422
+    assert uploads.upload_status(upload["upload_id"])["received_parts"] == []
+
+
+def test_truncated_gzip_part_is_400():
+    upload = uploads.init_upload("a.txt")
+
+    with pytest.raises(HTTPException) as exc:
+        write(upload["upload_id"], 0, gzip.compress(os.urandom(5000))[:-20], "gzip")
+
+    assert exc.value.status_code == 400
+    assert uploads.upload_status(upload["upload_id"])["received_parts"] == []
+
+
+def test_concatenated_gzip_members_are_all_stored(data_dir):
+    upload = uploads.init_upload("a.txt")
+    first, second = os.urandom(200_000), os.urandom(200_000)
+
+    result = write(upload["upload_id"], 0, gzip.compress(first) + gzip.compress(second), "gzip")
+
+    assert result["size"] == 400_000
+    assert result["sha256"] == sha(first + second)
+
+
+def test_gzip_part_with_trailing_garbage_is_400():
+    upload = uploads.init_upload("a.txt")
+
+    with pytest.raises(HTTPException) as exc:
+        write(upload["upload_id"], 0, gzip.compress(b"content") + b"not gzip", "gzip")
+
+    assert exc.value.status_code == 400
+
+
+def test_truncated_zstd_part_is_400():
+    zstandard = pytest.importorskip("zstandard")
+    if "zstd" not in uploads.SUPPORTED_ENCODINGS:
+        pytest.skip("zstd support was not enabled at import time")
+    upload = uploads.init_upload("a.txt")
+    frame = zstandard.ZstdCompressor().compress(os.urandom(200_000))
+
+    with pytest.raises(HTTPException) as exc:
+        write(upload["upload_id"], 0, frame[:-100], "zstd")
+
+    assert exc.value.status_code == 400
+    assert uploads.upload_status(upload["upload_id"])["received_parts"] == []
+
+
+def test_concatenated_zstd_frames_are_all_stored():
+    zstandard = pytest.importorskip("zstandard")
+    if "zstd" not in uploads.SUPPORTED_ENCODINGS:
+        pytest.skip("zstd support was not enabled at import time")
+    upload = uploads.init_upload("a.txt")
+    first, second = os.urandom(5000), b"z" * 100_000
+    compressor = zstandard.ZstdCompressor(write_checksum=True)
+
+    result = write(upload["upload_id"], 0, compressor.compress(first) + compressor.compress(second), "zstd")
+
+    assert result["sha256"] == sha(first + second)
+
+
+@pytest.mark.parametrize("encoding", ["identity", "gzip"])
+def test_oversized_part_is_413(monkeypatch, encoding):
+    monkeypatch.setattr(uploads, "MAX_PART_SIZE", 1000)
+    upload = uploads.init_upload("a.txt")
+    data = b"x" * 5000
+    payload = gzip.compress(data) if encoding == "gzip" else data
+
+    with pytest.raises(HTTPException) as exc:
+        write(upload["upload_id"], 0, payload, encoding)
+
+    assert exc.value.status_code == 413
+
+
+@pytest.mark.parametrize("filename", ["", ".", "..", ".uploads"])
+def test_invalid_filename_is_rejected_at_init(filename):
+    with pytest.raises(HTTPException) as exc:
+        uploads.init_upload(filename)
+
+    assert exc.value.status_code == 400
+
+
+def test_unsupported_encoding_is_415():
+    upload = uploads.init_upload("a.txt")
+
+    with pytest.raises(HTTPException) as exc:
+        write(upload["upload_id"], 0, b"data", "brotli")
+
+    assert exc.value.status_code == 415
+
+
+def test_zstd_part_round_trip_and_bomb_is_413(monkeypatch):
+    zstandard = pytest.importorskip("zstandard")
+    if "zstd" not in uploads.SUPPORTED_ENCODINGS:
+        pytest.skip("zstd support was not enabled at import time")
+    upload = uploads.init_upload("a.txt")
+    data = os.urandom(3000) + b"z" * 3000
+    write(upload["upload_id"], 0, zstandard.ZstdCompressor().compress(data), "zstd", sha(data))
+    uploads.commit_upload(upload["upload_id"], total_parts=1)
+
+    monkeypatch.setattr(uploads, "MAX_PART_SIZE", 10_000)
+    bomb_upload = uploads.init_upload("b.txt")
+    bomb = zstandard.ZstdCompressor().compress(b"\0" * 50_000_000)
+    with pytest.raises(HTTPException) as exc:
+        write(bomb_upload["upload_id"], 0, bomb, "zstd")
+    assert exc.value.status_code == 413
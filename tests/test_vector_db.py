@@ -0,0 +1,116 @@
+import os
+
+import pytest
+
+chromadb = pytest.importorskip("chromadb")
+pytest.importorskip("sentence_transformers")
+numpy = pytest.importorskip("numpy")
+
+from app import index_store, vector_db
+
+
+class FakeEncoder:
+    """Deterministic 3-d embeddings, so tests don't download a model"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def encode(self, texts, batch_size=32):
+        return numpy.array([[float(len(text)), float(text.count("a")) + 1.0, 1.0] for text in texts])
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_db, "SentenceTransformer", FakeEncoder)
+    monkeypatch.setattr(vector_db, "IndexVersions", lambda: index_store.IndexVersions(str(tmp_path), keep=1))
+    store = vector_db.VectorStore(versioned=True)
+    yield store
+    store.close()
+
+
+def _cached_systems():
+    # chroma's own (misspelled) per-path System cache that _release_client edits
+    from chromadb.api.client import SharedSystemClient
+    return dict(SharedSystemClient._identifer_to_system)
+
+
+def test_first_version_is_initialized_before_readers_open_it(store):
+    assert store.version == "v000001"
+    assert os.path.exists(os.path.join(store.index.path("v000001"), "chroma.sqlite3"))
+    assert store.search("discount")["ids"] == [[]]
+
+
+def test_publish_swaps_readers_and_releases_the_old_client(store):
+    first_path = store.index.path(store.version)
+
+    store.add_documents([{"filename": "spec.md", "content": "apply a discount code at checkout"}])
+
+    assert store.version == "v000002"
+    assert store.search("discount code")["metadatas"][0][0]["source"] == "spec.md"
+    # No search is running on v000001, so the swap closed it and dropped it from the lease
+    assert first_path not in _cached_systems()
+    assert store.index.held_versions() == {"v000002"}
+    # The staging client was released too; only the open version stays in chroma's cache
+    assert [path for path in _cached_systems() if path.startswith(store.index.root)] == [store.index.path("v000002")]
+
+    store.add_documents([{"filename": "other.md", "content": "payment form"}])
+
+    # keep=1: the next publish prunes v000001; v000002 was still open while v000003 was published
+    assert store.index.list_versions() == ["v000002", "v000003"]
+
+
+def test_swap_waits_for_running_searches(store):
+    store.add_documents([{"filename": "a.md", "content": "first version"}])
+    reading = store._reading()
+    version, client = reading.__enter__()
+
+    store.add_documents([{"filename": "b.md", "content": "second version"}])
+
+    # The old version is still open and leased while the search holds it
+    assert store.version != version
+    assert version in store.index.held_versions()
+    assert client.get_collection("qa_documents").count() == 1
+
+    reading.__exit__(None, None, None)
+
+    assert version not in store.index.held_versions()
+    assert store.index.path(version) not in _cached_systems()
+
+
+def test_stores_sharing_a_version_keep_it_open_for_each_other(store):
+    store.add_documents([{"filename": "a.md", "content": "shared version"}])
+    other = vector_db.VectorStore(versioned=True)
+    try:
+        with other._reading() as (version, client):
+            # store swaps away from the version other is still searching
+            store.add_documents([{"filename": "b.md", "content": "next version"}])
+
+            assert client.get_collection("qa_documents").count() == 1
+            assert store.index.path(version) in _cached_systems()
+    finally:
+        other.close()
+
+
+def test_close_releases_client_and_lease(store):
+    path = store.index.path(store.version)
+
+    store.close()
+
+    assert store.client is None
+    assert path not in _cached_systems()
+    assert store.index.held_versions() == set()
+
+
+def test_failed_publish_keeps_the_reader_client_working(store, monkeypatch):
+    store.add_documents([{"filename": "a.md", "content": "searchable text"}])
+
+    def fail(version):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(store.index, "publish", fail)
+    with pytest.raises(RuntimeError):
+        store.add_documents([{"filename": "b.md", "content": "never published"}])
+
+    assert store.version == "v000002"
+    assert store.search("searchable")["metadatas"][0][0]["source"] == "a.md"
+    assert not any(name.endswith(".staging") for name in os.listdir(store.index.versions_dir))